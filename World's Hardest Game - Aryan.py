@@ -4,10 +4,182 @@
 
 
 # Import necessary modules
+# Imports time first, so the time to the first frame counts the other imports
+import time
+# When the program started, for the time to the first frame
+STARTED = time.perf_counter()
 # Imports necessary GUI functions
-from tkinter import Tk, Canvas, Event, Button, PhotoImage
+from tkinter import Tk, Canvas, Event, Button, PhotoImage, TclError
+from tkinter.font import Font
 # Imports math for extra math functions
 import math
+# Imports sys and argparse for the command line options
+import sys
+import argparse
+# Imports a read-only dict view for the level data
+from types import MappingProxyType
+# Imports logging to report debugging information off the game loop
+import logging
+import logging.handlers
+import queue
+import atexit
+from collections import deque
+# Imports the modules used by the benchmarks
+import json
+import random
+import tracemalloc
+import gc
+# Imports the modules used to store compiled level packs
+import struct
+import mmap
+# Imports the modules used to run batches of levels and replays
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+# Imports heapq for the priority queue of the level solver
+import heapq
+# Imports bisect to find the segment of a path a distance falls on
+import bisect
+# Imports threading to read images ahead and to run the simulation in the
+# background
+import threading
+# Imports numpy when it is installed, to update all the balls at once
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Simulation rate of the game, in ticks per second (one tick every 30 ms)
+TICK_RATE = 1000 / 30
+
+# Level layout shared by the simulation and the renderer
+# Where the player (re)appears at the start of a round and after each death
+PLAYER_SPAWN = (178, 329)
+# The end area for the player
+VICTORY_ZONE = (771, 216, 893, 474)
+# Balls bounce back once their left edge reaches the first value or their
+# right edge reaches the second value
+BOUNCE_BOUNDS = (302, 720)
+# Walls surrounding the game area
+WALL_COORDS = [
+    (127, 214, 260, 220), (127, 214, 133, 475), (127, 469, 345, 475),
+    (255, 214, 261, 433), (255, 427, 302, 433), (296, 257, 302, 433),
+    (296, 257, 685, 263), (679, 214, 685, 263), (679, 214, 898, 220),
+    (892, 214, 898, 475), (339, 427, 345, 475), (339, 427, 724, 433),
+    (724, 257, 730, 433), (724, 257, 771, 263), (765, 263, 771, 475),
+    (765, 469, 898, 475)
+]
+# Safe areas of the level, drawn in green
+ZONES = [(132, 216, 256, 474), (771, 216, 893, 474)]
+# Colors of the checkerboard floor squares and of the safe zones
+FLOOR_COLORS = ('#e6e6ff', '#f7f7ff')
+ZONE_COLOR = '#befeb2'
+# Checkerboard floor of the level, as (x, y, size, shade) squares where the
+# shade indexes FLOOR_COLORS
+FLOOR = [(299 + i * 43, 259 + j * 43, 43, (i + j) % 2)
+         for i in range((729 - 299) // 43) for j in range((431 - 259) // 43)]
+FLOOR += [(299, 431, 43, 0), (299 - 43, 431, 43, 1), (686, 216, 43, 0),
+          (686 + 43, 216, 43, 1)]
+# Moving obstacles (balls) of the level
+BALL_SPECS = [
+    dict(x=302, y=270, x_speed=9.5), dict(x=700, y=313, x_speed=-9.5),
+    dict(x=302, y=356, x_speed=9.5), dict(x=700, y=399, x_speed=-9.5)
+]
+
+# Loggers for each category of debugging output. They are all silent unless
+# turned on with configure_logging, and callers on hot paths check
+# isEnabledFor first so a disabled category costs no formatting or I/O
+LOG = logging.getLogger('worlds_hardest_game')
+CALL_LOG = LOG.getChild('calls') # Entry and exit of decorated functions
+COLLISION_LOG = LOG.getChild('collision') # Deaths and near misses
+SCORE_LOG = LOG.getChild('score') # High score calculations
+LOOP_LOG = LOG.getChild('loop') # Frame timing statistics
+LOG_CATEGORIES = ('calls', 'collision', 'score', 'loop')
+LOG.setLevel(logging.WARNING)
+LOG.addHandler(logging.NullHandler())
+LOG.propagate = False
+
+# Class keeping the most recent log records in memory, so collisions can be
+# looked at after the fact without printing anything while playing
+class RingBufferHandler(logging.Handler):
+    # Constructor for setting up the buffer
+    def __init__(self, capacity=1000):
+        """Initializes the ring buffer handler.
+
+        Args:
+        capacity (int): Number of records to keep.
+
+        Returns:
+        None
+        """
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    # Method called by logging for every record
+    def emit(self, record):
+        """Stores a record, dropping the oldest one when full.
+
+        Args:
+        record (LogRecord): The record to store.
+
+        Returns:
+        None
+        """
+        self.records.append(record)
+
+    # Method to write the buffered records to a file
+    def dump(self, path):
+        """Writes the buffered records to a file, oldest first.
+
+        Args:
+        path (str): The file to write.
+
+        Returns:
+        None
+        """
+        formatter = self.formatter or logging.Formatter(LOG_FORMAT)
+        with open(path, 'w') as file:
+            for record in list(self.records):
+                file.write(formatter.format(record) + '\n')
+
+# Format of the log lines
+LOG_FORMAT = '%(relativeCreated)8.0f %(levelname)-7s %(name)s: %(message)s'
+
+# Function to turn on logging for the game
+def configure_logging(level='WARNING', categories=(), ring_size=0,
+                      stream=None):
+    """Sets up leveled logging, written to the stream by a background thread.
+
+    Args:
+    level (str): The lowest level logged for every category.
+    categories (list): Categories to log at debug level.
+    ring_size (int): Number of records to keep in memory, 0 for none.
+    stream (file): Where to write the log, defaulting to stderr.
+
+    Returns:
+    RingBufferHandler: The in-memory buffer, or None if ring_size is 0.
+    """
+    for handler in list(LOG.handlers):
+        LOG.removeHandler(handler)
+    LOG.setLevel(level)
+    for category in LOG_CATEGORIES:
+        LOG.getChild(category).setLevel(logging.DEBUG if category in
+                                        categories else logging.NOTSET)
+
+    # Records are queued by the game and written out by the listener thread
+    output = logging.StreamHandler(stream)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, output)
+    listener.start()
+    atexit.register(listener.stop)
+    LOG.addHandler(logging.handlers.QueueHandler(records))
+
+    ring = None
+    if ring_size:
+        ring = RingBufferHandler(ring_size)
+        LOG.addHandler(ring)
+    return ring
 
 # Decorator function for logging the entry and exit of function calls
 # for debugging purposes
@@ -32,57 +204,97 @@ def log_function_call(func):
         Returns:
         Any: The result of the function call.
         """
-        print(f"Entering: {func.__name__}")
+        if not CALL_LOG.isEnabledFor(logging.DEBUG):
+            return func(*args, **kwargs)
+        CALL_LOG.debug("Entering: %s", func.__name__)
         result = func(*args, **kwargs)
-        print(f"Exiting: {func.__name__}")
+        CALL_LOG.debug("Exiting: %s", func.__name__)
         return result
     return wrapper
 
-# Class representing a moving object in the game (like player or obstacles)
+# Direction keys of the player, in the order of the bits of a key mask
+KEY_ORDER = ('Up', 'Down', 'Left', 'Right')
+
+# Class representing a moving object in the game (like player or obstacles).
+# Objects only hold their state; drawing them is left to the Game renderer so
+# the simulation can run without a display. The attributes are a fixed set of
+# slots to keep objects small and fast to access, anything else passed in is
+# kept in the separate extras dict
 class MovingObject:
+    __slots__ = ('_x', '_y', 'size', 'color', 'shape', '_prev_x', '_prev_y',
+                 '_x_speed', '_y_speed', 'shape_type', 'extras')
+    # Keyword arguments that are part of the fixed attributes
+    schema = ('x_speed', 'y_speed', 'shape_type')
+
     # Constructor for initializing a moving object
-    def __init__(self, canvas, x, y, size, color, **kwargs):
-        """Initializes a moving object on the canvas.
+    def __init__(self, x, y, size, color, **kwargs):
+        """Initializes a moving object.
 
         Args:
-        canvas (Canvas): The canvas on which to draw the object.
         x (int): Initial x-coordinate of the object.
         y (int): Initial y-coordinate of the object.
         size (int): Size of the object.
         color (str): Color of the object.
-        **kwargs: Additional attributes such as speed and shape type.
+        **kwargs: Additional attributes such as speed and shape type. Names
+        outside of the schema are stored in extras.
 
         Returns:
         None
         """
-        self._canvas = canvas # Canvas the object is being drawn on
+        self.extras = None # Custom attributes, only created when needed
         self._x = x # X-coordinate of the object (weakly private)
         self._y = y # Y-coordinate of the object (weakly private)
         self.size = size # Size of the object
         self.color = color # Color of the object
+        self.shape = None # Canvas item id, set once the object is drawn
+        # Position before the last tick, used to interpolate drawing
+        self._prev_x = x
+        self._prev_y = y
         
         # Optional attributes, defaulting to 0 speed and rectangle shape
-        self._x_speed = kwargs.get('x_speed', 0)
-        self._y_speed = kwargs.get('y_speed', 0)
-        self.shape_type = kwargs.get('shape_type', 'rectangle')
-        
-        # Creating the shape on the canvas based on type
-        if self.shape_type == 'oval':
-            self.shape = self._canvas.create_oval(self._x, self._y, self._x +
-                                                  size, self._y + size,
-                                                  fill=self.color)
-        else:
-            self.shape = self._canvas.create_rectangle(self._x, self._y,
-                                                       self._x + size,
-                                                       self._y + size,
-                                                       fill=self.color)
+        self.x_speed = kwargs.pop('x_speed', 0)
+        self.y_speed = kwargs.pop('y_speed', 0)
+        self.shape_type = kwargs.pop('shape_type', 'rectangle')
             
-        # Assigning any additional attributes passed in kwargs
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+        # Keeping any additional attributes passed in kwargs
+        if kwargs:
+            self.extras = kwargs
+
+    # Method to look up custom attributes, only called for names that aren't
+    # one of the fixed attributes
+    def __getattr__(self, name):
+        """Returns a custom attribute stored in extras.
+
+        Args:
+        name (str): The attribute name.
+
+        Returns:
+        Any: The value of the custom attribute.
+
+        Raises:
+        AttributeError: If there is no such attribute.
+        """
+        if name != 'extras' and self.extras and name in self.extras:
+            return self.extras[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no " +
+                             f"attribute {name!r}")
+
+    # Method to set a custom attribute
+    def set_extra(self, name, value):
+        """Stores a custom attribute in extras.
+
+        Args:
+        name (str): The attribute name.
+        value (Any): The value of the attribute.
+
+        Returns:
+        None
+        """
+        if self.extras is None:
+            self.extras = {}
+        self.extras[name] = value
             
-    # Methods to get and set the X and Y coordinates of the object, and update
-    # its position on the canvas
+    # Methods to get and set the X and Y coordinates of the object
     def get_x(self):
         """Returns the x-coordinate of the object.
 
@@ -100,7 +312,7 @@ class MovingObject:
         return self._y
 
     def set_x(self, x):
-        """Sets a new x-coordinate for the object and updates its position.
+        """Sets a new x-coordinate for the object.
 
         Args:
         x (int): The new x-coordinate.
@@ -109,10 +321,9 @@ class MovingObject:
         None
         """
         self._x = x
-        self.update_position()
 
     def set_y(self, y):
-        """Sets a new y-coordinate for the object and updates its position.
+        """Sets a new y-coordinate for the object.
 
         Args:
         y (int): The new y-coordinate.
@@ -121,7 +332,39 @@ class MovingObject:
         None
         """
         self._y = y
-        self.update_position()
+
+    # Method to get the bounding box of the object
+    def bbox(self):
+        """Returns the bounding box of the object.
+
+        Returns:
+        tuple: The (left, top, right, bottom) coordinates of the object.
+        """
+        return (self._x, self._y, self._x + self.size, self._y + self.size)
+
+    # Methods used to draw the object between two simulation ticks
+    def remember_position(self):
+        """Stores the current position as the start of the next tick.
+
+        Returns:
+        None
+        """
+        self._prev_x = self._x
+        self._prev_y = self._y
+
+    def interpolated_bbox(self, alpha):
+        """Returns the bounding box blended between the last two ticks.
+
+        Args:
+        alpha (float): How far between the previous tick (0) and the current
+        tick (1) to place the object.
+
+        Returns:
+        tuple: The (left, top, right, bottom) coordinates of the object.
+        """
+        x = self._prev_x + (self._x - self._prev_x) * alpha
+        y = self._prev_y + (self._y - self._prev_y) * alpha
+        return (x, y, x + self.size, y + self.size)
     
     # Properties for getting and setting the object's speed, with constraints
     # on speed limits
@@ -168,43 +411,31 @@ class MovingObject:
         """
         self._y_speed = max(min(value, 10), -10)  # Limit speed to a range of
                                                   # -10 to 10
-
-    # Method to update the object's position on the canvas
-    def update_position(self):
-        """Updates the object's position on the canvas based on its current
-        coordinates.
-
-        Returns:
-        None
-        """
-        self._canvas.coords(self.shape, self._x, self._y, self._x + self.size,
-                            self._y + self.size)
-
     
 # Subclass for the player character, inheriting from MovingObject
 class Player(MovingObject):
+    __slots__ = ('speed', 'world', 'score', 'keys_pressed', 'is_moving')
     # Sets initial players score to 100
     max_score = 100
     # Constructor initializing the player with attributes like position, size,
-    # color, speed, and the game instance
-    def __init__(self, canvas, x, y, size, color, speed, game):
+    # color, speed, and the world it moves in
+    def __init__(self, x, y, size, color, speed, world):
         """Initializes the player object with specific attributes.
 
         Args:
-        canvas (Canvas): The canvas on which the player is drawn.
         x (int): The x-coordinate of the player.
         y (int): The y-coordinate of the player.
         size (int): The size of the player.
         color (str): The color of the player.
         speed (int): The speed of the player.
-        game (Game): Reference to the game instance.
+        world (World): Reference to the simulated world.
 
         Returns:
         None
         """
-        super().__init__(canvas, x, y, size, color)
+        super().__init__(x, y, size, color)
         self.speed = speed # Players speed
-        self.game = game # game instance
+        self.world = world # world instance
         self.score = 100  # Starting score
         # Tracks keys pressed
         self.keys_pressed = {'Up': False, 'Down': False, 'Left': False,
@@ -234,30 +465,24 @@ class Player(MovingObject):
         if self.keys_pressed['Right']:
             dx += self.speed
         
-        # Calculate the distance to the nearest obstacle
-        distance = self.game.distance_to_obstacle(self, dx, dy)
-        actual_dx = min(abs(dx), distance) * (1 if dx > 0 else -1)
-        actual_dy = min(abs(dy), distance) * (1 if dy > 0 else -1)
+        # Sweep the move against the walls, stopping at the first contact and
+        # sliding along the wall with what is left
+        actual_dx, actual_dy = self.world.sweep_move(self, dx, dy)
 
         # Move the player
         self.set_x(self.get_x() + actual_dx)
         self.set_y(self.get_y() + actual_dy)
-        
-        if self.is_moving:
-            self._canvas.after(30, self.move)
 
     # Methods to start and stop continuous player movement
     def start_movement(self):
         """Starts the player's continuous movement.
 
-        Initiates the movement process if the player is not already moving.
+        The world moves the player on every tick while it is moving.
 
         Returns:
         None
         """
-        if not self.is_moving:
-            self.is_moving = True
-            self.move()
+        self.is_moving = True
 
     def stop_movement(self):
         """Stops the player's continuous movement.
@@ -269,11 +494,40 @@ class Player(MovingObject):
         """
         self.is_moving = False
 
+    # Methods to read and set the held keys as a bit mask, one bit per key
+    # of KEY_ORDER, used to record and replay inputs
+    def key_mask(self):
+        """Returns the direction keys currently held.
+
+        Returns:
+        int: A bit mask with one bit per key of KEY_ORDER.
+        """
+        keys = self.keys_pressed
+        return sum(1 << bit for bit, key in enumerate(KEY_ORDER)
+                   if keys.get(key))
+
+    def set_key_mask(self, mask):
+        """Sets which direction keys are held.
+
+        Args:
+        mask (int): A bit mask with one bit per key of KEY_ORDER.
+
+        Returns:
+        None
+        """
+        for bit, key in enumerate(KEY_ORDER):
+            self.keys_pressed[key] = bool(mask & 1 << bit)
+        if mask:
+            self.start_movement()
+        else:
+            self.stop_movement()
+
     # Event handlers for key press and release, to control player movement
     def key_down(self, event: Event):
         """Handles the key down event for player movement.
 
-        Marks the corresponding direction as active upon key press.
+        Marks the corresponding direction as active upon key press. Keys
+        other than the arrows are ignored.
 
         Args:
         event (Event): The key press event containing the key symbol.
@@ -281,7 +535,8 @@ class Player(MovingObject):
         Returns:
         None
         """
-
+        if event.keysym not in KEY_ORDER:
+            return
         self.keys_pressed[event.keysym] = True
         self.start_movement()
 
@@ -296,6 +551,8 @@ class Player(MovingObject):
         Returns:
         None
         """
+        if event.keysym not in KEY_ORDER:
+            return
         self.keys_pressed[event.keysym] = False
         if not any(self.keys_pressed.values()):
             self.stop_movement()
@@ -368,329 +625,3289 @@ class Player(MovingObject):
         # Reduce score by 10, not going below 0
         self.score = max(self.score - 10, 0)  
 
-# Main game class handling the game logic and UI
-class Game:
-    # Sets initial high score of the player to 0
-    high_score = 0
-    # Constructor for setting up the game window, canvas, and initial game state
-    def __init__(self, width, height):
-        """Initializes the game environment.
+# Function finding when a moving rectangle first overlaps another one
+def sweep_time(rect, dx, dy, target):
+    """Calculates the time of impact of a rectangle moving over one tick.
 
-        Args:
-        width (int): Width of the game window.
-        height (int): Height of the game window.
+    The rectangle moves by (dx, dy) between time 0 and 1. Touching edges
+    don't count as overlapping, the same as the overlap checks.
 
-        Returns:
-        None
-        """
-        self.window = Tk() # Initializes window
-        self.window.title("World's Hardest Game") # Sets a title for the window
-        # Disallows the user from changing the window size
-        self.window.resizable(False, False)
-        # Creates the canvas
-        self.canvas = Canvas(self.window, width=width, height=height,
-                             bg='black')
-        self.canvas.pack(fill='both', expand=True)
-        self.moving_objects = [] # Initializes the list for moving objects
-        self.walls = [] # Initializes the list for wall coordinates
-        self.death_count = 0 # Initializes the players death count
-        # Adds a death counter
-        self.death_counter_disp = self.canvas.create_text(850, 26,
-                                                             text="DEATHS: 0",
-                                                             fill="white",
-                                                             font=("Arial", 24))
-        # Adds the end area for the player
-        self.victory_zone = (771, 216, 893, 474)
-        # Boolean if the game is complete or not
-        self.game_over = False
-        self.show_start_screen()
+    Args:
+    rect (tuple): The (left, top, right, bottom) moving rectangle.
+    dx (float): The x-axis movement over the tick.
+    dy (float): The y-axis movement over the tick.
+    target (tuple): The (left, top, right, bottom) rectangle standing still.
 
-    # Class method to create a game instance with default settings
-    @classmethod
-    def create_default_game(cls):
-        """Creates a new game instance with default settings.
+    Returns:
+    float: When the rectangles start to overlap, between 0 and 1, or None if
+    they don't overlap during the tick.
+    """
+    enter, leave = -math.inf, math.inf
+    for low, high, target_low, target_high, delta in (
+            (rect[0], rect[2], target[0], target[2], dx),
+            (rect[1], rect[3], target[1], target[3], dy)):
+        if delta == 0:
+            if high <= target_low or low >= target_high:
+                return None
+            continue
+        start = (target_low - high) / delta
+        end = (target_high - low) / delta
+        if start > end:
+            start, end = end, start
+        enter = max(enter, start)
+        leave = min(leave, end)
+    if enter < leave and enter < 1 and leave > 0:
+        return max(enter, 0.0)
+    return None
 
-        Returns:
-        Game: A new instance of the Game class.
-        """
-        return cls(1024, 644)
-    
-    # Method to display the start screen of the game
-    def show_start_screen(self):
-        """Displays the start screen of the game.
+# Function finding the distance from a point to a rectangle
+def point_rect_distance(x, y, rect):
+    """Calculates the distance from a point to the closest point of a
+    rectangle.
 
-        Initializes and shows the game's start screen, including the title and
-        start button.
+    Args:
+    x (float): x-coordinate of the point.
+    y (float): y-coordinate of the point.
+    rect (tuple): The (left, top, right, bottom) rectangle.
 
-        Returns:
-        None
-        """
-        # Add the title image
-        self.start_image = PhotoImage(file='title.png')
+    Returns:
+    float: The distance, 0 if the point is inside the rectangle.
+    """
+    return math.hypot(x - min(max(x, rect[0]), rect[2]),
+                      y - min(max(y, rect[1]), rect[3]))
 
-        # Clear the canvas and set up the start screen
-        self.canvas.delete("all")
-        # Create the background
-        self.canvas.create_rectangle(0, 49, 1026, 646, fill='#b4b6fe')
-        # Display the title
-        self.canvas.create_image(512, 322, image=self.start_image,
-                                 anchor='center')
-        # Create a Play Game button
-        start_button = Button(self.canvas, text="Play Game",
-                              command=self.show_rules_screen, 
-                              font=("Arial", 16), padx=20, pady=10)
-        start_button_window = self.canvas.create_window(512, 500,
-                                                        window=start_button)
-        
-    # Method to display the game's rules screen    
-    def show_rules_screen(self):
-        """Displays the game rules screen.
+# Function finding the distance from a point to a line segment
+def point_segment_distance(x, y, x1, y1, x2, y2):
+    """Calculates the distance from a point to a line segment.
 
-        Shows the screen with instructions and rules of the game.
+    Args:
+    x (float): x-coordinate of the point.
+    y (float): y-coordinate of the point.
+    x1 (float): x-coordinate of the start of the segment.
+    y1 (float): y-coordinate of the start of the segment.
+    x2 (float): x-coordinate of the end of the segment.
+    y2 (float): y-coordinate of the end of the segment.
 
-        Returns:
-        None
-        """
-        self.canvas.delete("all")
-        
-        # Create the background
-        self.canvas.create_rectangle(0, 0, 1026, 646, fill='#b4b6fe')
+    Returns:
+    float: The distance.
+    """
+    dx, dy = x2 - x1, y2 - y1
+    length = dx * dx + dy * dy
+    t = 0 if length == 0 else \
+        max(0, min(1, ((x - x1) * dx + (y - y1) * dy) / length))
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
 
-        # Create the rules text with highlighted colors
-        self.canvas.create_text(386, 100, text="You are the", fill="black",
-                                font=("Arial", 24))
-        self.canvas.create_text(555, 100, text="red", fill="red",
-                                font=("Arial", 24))
-        self.canvas.create_text(682, 100, text="square.", fill="black",
-                                font=("Arial", 24))
-        self.canvas.create_text(380, 180, text="Avoid the", fill="black",
-                                font=("Arial", 24))
-        self.canvas.create_text(538, 180, text="blue", fill="blue",
-                                font=("Arial", 24))
-        self.canvas.create_text(670, 180, text="circles.", fill="black",
-                                font=("Arial", 24))
-        self.canvas.create_text(512, 260,
-                                text="Move to the green area to complete" +
-                                " the level.", fill="black", font=("Arial", 24))
-        self.canvas.create_text(155, 260, text="Move to the", fill="black",
-                                font=("Arial", 24))
-        self.canvas.create_text(356, 260, text="green", fill="green",
-                                font=("Arial", 24))
-        self.canvas.create_text(712, 260, text="area to complete the level.",
-                                fill="black", font=("Arial", 24))
-        self.canvas.create_text(512, 340,
-                                text="The less times you die, the better.",
-                                fill="black", font=("Arial", 24))
+# Function checking if a circle moving along a segment touches a rectangle
+def swept_circle_hits_rect(x1, y1, x2, y2, radius, rect):
+    """Checks whether a circle overlaps a rectangle anywhere along its path.
 
-        # Create a "Play" button to start the game
-        play_button = Button(self.canvas, text="Play Game",
-                             command=self.start_game, font=("Arial", 16),
-                             padx=20, pady=10)
-        play_button_window = self.canvas.create_window(512, 500,
-                                                       window=play_button)
-    
-    # Method to initialize game elements like the player, obstacles,
-    # death counter, etc.
-    def initialize_game_elements(self):
-        """Initializes all game elements for a new game session.
+    Touching edges don't count as overlapping.
 
-        Sets up the player, obstacles, and other game elements to their initial
-        state.
+    Args:
+    x1 (float): x-coordinate of the center at the start of the path.
+    y1 (float): y-coordinate of the center at the start of the path.
+    x2 (float): x-coordinate of the center at the end of the path.
+    y2 (float): y-coordinate of the center at the end of the path.
+    radius (float): Radius of the circle.
+    rect (tuple): The (left, top, right, bottom) rectangle.
+
+    Returns:
+    bool: True if the circle overlaps the rectangle during the move.
+    """
+    # The center passing through the rectangle is always a hit
+    if sweep_time((x1, y1, x1, y1), x2 - x1, y2 - y1, rect) is not None:
+        return True
+    # Otherwise the closest approach is at an end of the path or a corner
+    distance = min(point_rect_distance(x1, y1, rect),
+                   point_rect_distance(x2, y2, rect),
+                   *(point_segment_distance(x, y, x1, y1, x2, y2)
+                     for x in (rect[0], rect[2]) for y in (rect[1], rect[3])))
+    return distance < radius
+
+# Class indexing wall rectangles in a uniform grid, so collision queries only
+# look at the walls near the player instead of every wall of the level
+class WallIndex:
+    # Constructor for bucketing the walls into grid cells
+    def __init__(self, walls, cell_size=64):
+        """Initializes the wall index.
+
+        Args:
+        walls (list): Wall rectangles as (left, top, right, bottom) tuples.
+        cell_size (int): Width and height of a grid cell.
 
         Returns:
         None
         """
-        self.canvas.delete("all")
-        self.create_background()
-        self.moving_objects = []
-        
-        # Add player
-        self.player = Player(self.canvas, 178, 329, 31, 'red', 10, self)
-        self.add_moving_object(self.player)
-        
-        # Display the death counter
-        self.death_counter_disp = self.canvas.create_text(850, 26,
-                                                          text=f"DEATHS: "+
-                                                          f"{self.death_count}",
-                                                             fill="white",
-                                                             font=("Arial", 24))
+        self.cell_size = cell_size
+        self.cells = {} # Walls touching each (column, row) cell
+        for wall in walls:
+            for cell in self._cells(wall):
+                bucket = self.cells.setdefault(cell, [])
+                if wall not in bucket:
+                    bucket.append(wall)
 
-        # Add moving obstacles (balls)
-        ball1 = MovingObject(game.canvas, 302, 270, 24, 'blue', x_speed=9.5,
-                             shape_type='oval', custom_attr='value')
-        ball2 = MovingObject(game.canvas, 700, 313, 24, 'blue', x_speed=-9.5,
-                             shape_type='oval', custom_attr='value')
-        ball3 = MovingObject(game.canvas, 302, 356, 24, 'blue', x_speed=9.5,
-                             shape_type='oval', custom_attr='value')
-        ball4 = MovingObject(game.canvas, 700, 399, 24, 'blue', x_speed=-9.5,
-                             shape_type='oval', custom_attr='value')
-
-        game.add_moving_object(ball1)
-        game.add_moving_object(ball2)
-        game.add_moving_object(ball3)
-        game.add_moving_object(ball4)
-        
-        # Rebind the key events to the new player object
-        self.window.bind('<KeyPress>', self.player.key_down)
-        self.window.bind('<KeyRelease>', self.player.key_up)
-        
-        self.game_over = False
-          
-    # Method to start the game, setting up the game elements and beginning the
-    # animation loop 
-    def start_game(self):
-        """Starts the game.
+    # Method to list the grid cells a rectangle touches
+    def _cells(self, rect):
+        """Lists the grid cells touched by a rectangle, edges included.
 
-        Triggers the beginning of the game, including setting up the
-        environment and starting the animation loop.
+        Args:
+        rect (tuple): The (left, top, right, bottom) rectangle.
 
         Returns:
-        None
+        list: The (column, row) pairs of the touched cells.
         """
-        self.initialize_game_elements()
-        self.window.bind('<KeyPress>', self.player.key_down)
-        self.window.bind('<KeyRelease>', self.player.key_up)
-        self.animate()
-        
-    # Method to create the game's background, including the grid, start and
-    # end zones   
-    def create_background(self):
-        """Creates the game's background environment.
+        size = self.cell_size
+        return [(column, row)
+                for column in range(int(rect[0] // size),
+                                    int(rect[2] // size) + 1)
+                for row in range(int(rect[1] // size),
+                                 int(rect[3] // size) + 1)]
 
-        Draws the background, grid, and start/end zones for the game.
+    # Method to find the walls near a rectangle
+    def query(self, rect):
+        """Finds the walls that share a grid cell with a rectangle.
+
+        Every wall overlapping or touching the rectangle is returned, along
+        with some nearby walls, so callers still test the exact geometry.
+
+        Args:
+        rect (tuple): The (left, top, right, bottom) rectangle.
 
         Returns:
-        None
+        list: The candidate wall rectangles, without duplicates.
         """
-        # Drawing background, grid, start and end zones
-        green_color = '#befeb2'
-        grey_color = '#e6e6ff'
-        white_color = '#f7f7ff'
-        square_size = 43
-        start_x, start_y = 299, 259
-        end_x, end_y = 729, 431
-        
-        # Create a purple rectangle as the background of the game area
-        self.canvas.create_rectangle(0, 49, 1026, 646, fill='#b4b6fe')
-
-        # Create a grid of squares for the player to move in
-        num_squares_x = (end_x - start_x) // square_size
-        num_squares_y = (end_y - start_y) // square_size
-
-        for i in range(num_squares_x):
-            for j in range(num_squares_y):
-                corner_x = start_x + i * square_size
-                corner_y = start_y + j * square_size
-                color = grey_color if (i + j) % 2 == 0 else white_color
-                self.canvas.create_rectangle(corner_x, corner_y, corner_x +
-                                             square_size, corner_y +
-                                             square_size, fill=color,
-                                             outline='')
-
-        self.canvas.create_rectangle(299, 431, 299 + square_size, 431 +
-                                     square_size, fill=grey_color, outline='')
-        self.canvas.create_rectangle(299 - 43, 431, 299 - 43 + square_size,
-                                     431 + square_size, fill=white_color,
-                                     outline='')
-        self.canvas.create_rectangle(686, 216, 686 + square_size, 216 +
-                                     square_size, fill=grey_color, outline='')
-        self.canvas.create_rectangle(686 + 43, 216, 686 + 43 + square_size,
-                                     216 + square_size, fill=white_color,
-                                     outline='')
-        
-        # Start and end zones
-        self.canvas.create_rectangle(132, 216, 256, 474, fill=green_color,
-                                     outline='')
-        self.canvas.create_rectangle(771, 216, 893, 474, fill=green_color,
-                                     outline='')
-        
-        # Walls surrounding the game area
-        wall_coords = [
-            (127, 214, 260, 220), (127, 214, 133, 475), (127, 469, 345, 475),
-            (255, 214, 261, 433), (255, 427, 302, 433), (296, 257, 302, 433),
-            (296, 257, 685, 263), (679, 214, 685, 263), (679, 214, 898, 220),
-            (892, 214, 898, 475), (339, 427, 345, 475), (339, 427, 724, 433),
-            (724, 257, 730, 433), (724, 257, 771, 263), (765, 263, 771, 475),
-            (765, 469, 898, 475)
-        ]
-        
-        # Loop to add walls as a perimeter of the map
-        for coords in wall_coords:
-            self.canvas.create_rectangle(*coords, fill="black", outline='')
-            self.walls.append(coords)  # Store wall coordinates
+        size = self.cell_size
+        left, top = int(rect[0] // size), int(rect[1] // size)
+        right, bottom = int(rect[2] // size), int(rect[3] // size)
+        if left == right and top == bottom:
+            return self.cells.get((left, top), [])
+        found = {}
+        for column in range(left, right + 1):
+            for row in range(top, bottom + 1):
+                for wall in self.cells.get((column, row), ()):
+                    found[wall] = None
+        return list(found)
 
+# Class holding the geometry of a level. It is built once and never changes,
+# so every round and every game played reuses the same walls and wall index
+class Level:
+    __slots__ = ('walls', 'victory_zone', 'spawn', 'bounce_bounds',
+                 'ball_specs', 'floor', 'zones', 'name', 'wall_index')
 
-    # Method to add a moving object (like an obstacle) to the game
-    def add_moving_object(self, obj):
-        """Adds a moving object to the game.
+    # Constructor for precomputing the level geometry
+    def __init__(self, walls, victory_zone, spawn, bounce_bounds, ball_specs,
+                 floor=FLOOR, zones=ZONES, name='Level'):
+        """Initializes the level.
 
         Args:
-        obj (MovingObject): The moving object to be added.
+        walls (list): Wall rectangles as (left, top, right, bottom) tuples.
+        victory_zone (tuple): The end area for the player.
+        spawn (tuple): Where the player starts and respawns.
+        bounce_bounds (tuple): Left and right limits the balls bounce between.
+        ball_specs (list): Keyword arguments for each ball of the level.
+        floor (list): Checkerboard squares as (x, y, size, shade) tuples.
+        zones (list): Safe areas drawn in green, as rectangles.
+        name (str): Name of the level.
 
         Returns:
         None
         """
-        self.moving_objects.append(obj)
+        define = super().__setattr__
+        define('name', name)
+        define('floor', tuple(tuple(square) for square in floor))
+        define('zones', tuple(tuple(zone) for zone in zones))
+        define('walls', tuple(tuple(wall) for wall in walls))
+        define('victory_zone', tuple(victory_zone))
+        define('spawn', tuple(spawn))
+        define('bounce_bounds', tuple(bounce_bounds))
+        define('ball_specs', tuple(MappingProxyType(dict(spec))
+                                   for spec in ball_specs))
+        define('wall_index', WallIndex(self.walls))
 
-    # Method to reset the game to its initial state
-    def reset_game(self):
-        """Resets the game to its initial state.
+    # Method stopping the level from being modified after it is built
+    def __setattr__(self, name, value):
+        """Prevents changes to the level geometry.
 
-        Returns:
-        None
+        Args:
+        name (str): The attribute being set.
+        value (Any): The value being assigned.
+
+        Raises:
+        AttributeError: Always, as levels are immutable.
         """
-        self.death_count = 0
-        self.initialize_game_elements()
-        self.animate()
-        
-        
-    # Main game loop method to handle animation, movement of objects, and game
-    # logic checks
-    def animate(self):
-        """Main animation loop for the game.
+        raise AttributeError(f"Level geometry can't be changed ({name})")
+
+    # Methods converting levels to and from the JSON authoring format
+    def to_dict(self):
+        """Returns the level as plain data, ready to be saved as JSON.
 
         Returns:
-        None
+        dict: The level data.
         """
-        if self.game_over:
-            return
-        
-        for obj in self.moving_objects:
-            obj.set_x(obj.get_x() + obj.x_speed)
-            obj.set_y(obj.get_y() + obj.y_speed)
+        return {'name': self.name, 'spawn': list(self.spawn),
+                'victory_zone': list(self.victory_zone),
+                'bounce_bounds': list(self.bounce_bounds),
+                'walls': [list(wall) for wall in self.walls],
+                'zones': [list(zone) for zone in self.zones],
+                'floor': [list(square) for square in self.floor],
+                'balls': [dict(spec) for spec in self.ball_specs]}
 
-            if isinstance(obj, MovingObject) and obj.shape_type == 'oval':
-                (leftpos, toppos, rightpos, bottompos) = \
-                          self.canvas.coords(obj.shape)
-                if leftpos <= 302 or rightpos >= 720:
-                    obj.x_speed = -obj.x_speed
+    @classmethod
+    def from_dict(cls, data):
+        """Creates a level from plain data loaded from JSON.
 
-            # Check for collision with the player
-            if isinstance(obj, MovingObject) and obj.shape_type == 'oval' and \
-               self.check_collision(self.player, obj):
-                # Reset player to starting position
-                self.player.set_x(178)
-                self.player.set_y(329)
-                self.player.reduce_score()
-                self.update_death_counter()  # Update the death counter
-            
-            # Proximity checking logic for collision debugging
-            if isinstance(obj, MovingObject) and obj.shape_type == 'oval':
-                player_center_x = self.player.get_x() + self.player.size / 2
-                player_center_y = self.player.get_y() + self.player.size / 2
-                obj_center_x = obj.get_x() + obj.size / 2
-                obj_center_y = obj.get_y() + obj.size / 2
-
-                # Debugging messages in the shell
-                if Game.calculate_distance(player_center_x,
-                                           player_center_y,
-                                           obj_center_x, obj_center_y) < 50:
-                    print("Player is close to an oval")
+        Args:
+        data (dict): The level data, as written by to_dict.
+
+        Returns:
+        Level: The new level.
+        """
+        return cls(data['walls'], data['victory_zone'], data['spawn'],
+                   data.get('bounce_bounds', BOUNCE_BOUNDS), data['balls'],
+                   data.get('floor', ()), data.get('zones', ()),
+                   data.get('name', 'Level'))
+
+# The level played by default
+DEFAULT_LEVEL = Level(WALL_COORDS, VICTORY_ZONE, PLAYER_SPAWN, BOUNCE_BOUNDS,
+                      BALL_SPECS, name='Level 1')
+
+# Level packs are stored as JSON for authoring and compiled to a binary form
+# for shipping. The binary pack starts with a header and a table giving the
+# offset and length of every level, so a level is only decoded when played
+PACK_MAGIC = b'WHGP'
+PACK_VERSION = 2
+PACK_HEADER = struct.Struct('<4sHI') # Magic, version, number of levels
+PACK_ENTRY = struct.Struct('<II') # Offset and length of a level
+# Fixed part of a compiled level: spawn, victory zone, bounce bounds, then
+# the number of walls, zones, floor squares and balls and the name length.
+# The rectangles and the balls follow as 64 bit floats, so coordinates and
+# speeds that aren't whole numbers are stored exactly
+LEVEL_HEADER = struct.Struct('<2d4d2d5I')
+BALL_FIELDS = ('x', 'y', 'x_speed', 'y_speed', 'size')
+
+# Function reading levels from a JSON file
+def load_levels_json(path):
+    """Loads the levels of a JSON file.
+
+    The file holds either a single level or {"levels": [...]}.
+
+    Args:
+    path (str): The JSON file.
+
+    Returns:
+    list: The levels of the file.
+    """
+    with open(path) as file:
+        data = json.load(file)
+    return [Level.from_dict(level) for level in data.get('levels', [data])]
+
+# Function writing levels to a JSON file
+def save_levels_json(levels, path):
+    """Saves levels to a JSON file for editing.
+
+    Args:
+    levels (list): The levels to save.
+    path (str): The JSON file.
+
+    Returns:
+    None
+    """
+    with open(path, 'w') as file:
+        json.dump({'levels': [level.to_dict() for level in levels]}, file,
+                  indent=1)
+
+# Function encoding a level in the compact binary form
+def encode_level(level):
+    """Encodes a level as bytes.
+
+    Balls only keep the position, speed and size fields, custom attributes
+    and colors stay in the JSON source.
+
+    Args:
+    level (Level): The level to encode.
+
+    Returns:
+    bytes: The encoded level.
+
+    Raises:
+    ValueError: If some balls follow a path instead of bouncing.
+    """
+    name = level.name.encode('utf-8')
+    parts = [LEVEL_HEADER.pack(*level.spawn, *level.victory_zone,
+                               *level.bounce_bounds, len(level.walls),
+                               len(level.zones), len(level.floor),
+                               len(level.ball_specs), len(name)), name]
+    if any('path' in spec for spec in level.ball_specs):
+        raise ValueError(f"{level.name} has balls following paths, which " +
+                         "level packs can't hold; keep it as JSON")
+    rects = [value for rect in level.walls + level.zones + level.floor
+             for value in rect]
+    balls = [spec.get(field, 24 if field == 'size' else 0)
+             for spec in level.ball_specs for field in BALL_FIELDS]
+    parts.append(struct.pack(f'<{len(rects)}d', *rects))
+    parts.append(struct.pack(f'<{len(balls)}d', *balls))
+    return b''.join(parts)
+
+# Function decoding a level from the compact binary form
+def decode_level(data):
+    """Decodes a level encoded by encode_level.
+
+    Args:
+    data (bytes): The encoded level.
+
+    Returns:
+    Level: The decoded level.
+    """
+    header = LEVEL_HEADER.unpack_from(data)
+    walls, zones, floor, balls, name_length = header[8:]
+    offset = LEVEL_HEADER.size
+    name = bytes(data[offset:offset + name_length]).decode('utf-8')
+    offset += name_length
+    count = (walls + zones + floor) * 4
+    values = struct.unpack_from(f'<{count}d', data, offset)
+    offset += count * 8
+    values += struct.unpack_from(f'<{balls * len(BALL_FIELDS)}d', data,
+                                 offset)
+
+    def take(number, width):
+        """Splits the next values into tuples of a given width."""
+        nonlocal values
+        items = [values[i:i + width] for i in range(0, number * width, width)]
+        values = values[number * width:]
+        return items
+    wall_rects, zone_rects = take(walls, 4), take(zones, 4)
+    floor_squares = [(x, y, size, int(shade))
+                     for x, y, size, shade in take(floor, 4)]
+    ball_specs = [dict(zip(BALL_FIELDS, ball))
+                  for ball in take(balls, len(BALL_FIELDS))]
+    return Level(wall_rects, header[2:6], header[0:2], header[6:8],
+                 ball_specs, floor_squares, zone_rects, name)
+
+# Function writing a compiled level pack
+def compile_level_pack(levels, path):
+    """Compiles levels into a binary level pack.
+
+    Args:
+    levels (list): The levels to compile.
+    path (str): The pack file to write.
+
+    Returns:
+    None
+    """
+    blobs = [encode_level(level) for level in levels]
+    offset = PACK_HEADER.size + PACK_ENTRY.size * len(blobs)
+    with open(path, 'wb') as file:
+        file.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(blobs)))
+        for blob in blobs:
+            file.write(PACK_ENTRY.pack(offset, len(blob)))
+            offset += len(blob)
+        for blob in blobs:
+            file.write(blob)
+
+# Class giving access to the levels of a compiled pack. The file is memory
+# mapped, so opening a pack only reads its header and a level is decoded the
+# first time it is asked for
+class LevelPack:
+    # Constructor for opening the pack
+    def __init__(self, path):
+        """Opens a compiled level pack.
+
+        Args:
+        path (str): The pack file.
+
+        Raises:
+        ValueError: If the file isn't a level pack this version can read.
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = PACK_HEADER.unpack_from(self.data)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.data.close()
+            raise ValueError(f"{path} is not a version {PACK_VERSION} " +
+                             "level pack")
+        self.count = count
+        self.levels = {} # Levels decoded so far, by index
+
+    def __len__(self):
+        """Returns the number of levels in the pack.
+
+        Returns:
+        int: The number of levels.
+        """
+        return self.count
+
+    def __getitem__(self, index):
+        """Returns a level of the pack, decoding it on first use.
+
+        Args:
+        index (int): Index of the level.
+
+        Returns:
+        Level: The level.
+
+        Raises:
+        IndexError: If there is no such level.
+        """
+        if not -self.count <= index < self.count:
+            raise IndexError(f"level {index} is not in {self.path}")
+        index %= self.count
+        if index not in self.levels:
+            offset, length = PACK_ENTRY.unpack_from(
+                self.data, PACK_HEADER.size + index * PACK_ENTRY.size)
+            with memoryview(self.data)[offset:offset + length] as blob:
+                self.levels[index] = decode_level(blob)
+        return self.levels[index]
+
+    # Method to read the name of a level without decoding it
+    def name(self, index):
+        """Returns the name of a level of the pack.
+
+        Args:
+        index (int): Index of the level.
+
+        Returns:
+        str: The name of the level.
+
+        Raises:
+        IndexError: If there is no such level.
+        """
+        if not -self.count <= index < self.count:
+            raise IndexError(f"level {index} is not in {self.path}")
+        index %= self.count
+        offset, length = PACK_ENTRY.unpack_from(
+            self.data, PACK_HEADER.size + index * PACK_ENTRY.size)
+        name_length = LEVEL_HEADER.unpack_from(self.data, offset)[-1]
+        start = offset + LEVEL_HEADER.size
+        return self.data[start:start + name_length].decode('utf-8')
+
+    # Method to release the file
+    def close(self):
+        """Closes the memory mapped file.
+
+        Returns:
+        None
+        """
+        self.data.close()
+
+# Function opening the levels of a JSON file or a compiled pack
+def load_levels(path):
+    """Loads the levels of a file, lazily for compiled packs.
+
+    Args:
+    path (str): A JSON file or a compiled level pack.
+
+    Returns:
+    list or LevelPack: The levels, indexable by number.
+    """
+    with open(path, 'rb') as file:
+        compiled = file.read(len(PACK_MAGIC)) == PACK_MAGIC
+    return LevelPack(path) if compiled else load_levels_json(path)
+
+# Most (ticks x balls) entries of a ball trajectory table. Balls are only
+# watched for a repeat this long, so levels without a short period stop
+# paying for the search quickly
+TRAJECTORY_LIMIT = 20000
+
+# Class holding the state of a round's balls over one period of their motion
+class Trajectory:
+    # Constructor for the table of rows
+    def __init__(self, x, y, x_speed, start, length):
+        """Initializes the trajectory table.
+
+        Row k holds the state of the balls after k ticks. From tick start
+        onwards the balls repeat the same length ticks forever.
+
+        Args:
+        x (ndarray or list): x coordinate of every ball, one row per tick.
+        y (ndarray or list): y coordinate of every ball, one row per tick.
+        x_speed (ndarray or list): x-axis speed of every ball, one row per
+        tick.
+        start (int): First tick of the repeating part.
+        length (int): Number of ticks the balls take to repeat.
+
+        Returns:
+        None
+        """
+        self.x = x
+        self.y = y
+        self.x_speed = x_speed
+        self.start = start
+        self.length = length
+
+    # Method to find the row holding the state at a tick
+    def row(self, tick):
+        """Returns the row of the table holding the state at a tick.
+
+        Args:
+        tick (int): Number of ticks since the start of the round.
+
+        Returns:
+        int: The index of the row.
+        """
+        if tick < self.start:
+            return tick
+        return self.start + (tick - self.start) % self.length
+
+# Keyword arguments of a ball that describe the path it follows
+PATH_FIELDS = {'path', 'points', 'closed', 'pivot', 'radius', 'speed', 'lap',
+               'offset'}
+
+# Laps of the path balls, by path geometry and number of ticks, shared by
+# every ball following the same path
+PATH_CACHE = {}
+
+# Function finding the point at some distance along a polyline
+def point_along(points, lengths, distance):
+    """Returns the point at a distance along a polyline.
+
+    Args:
+    points (list): The (x, y) points of the polyline.
+    lengths (list): Distance along the polyline of each point.
+    distance (float): Distance from the first point, between 0 and the
+    length of the polyline.
+
+    Returns:
+    tuple: The (x, y) point.
+    """
+    i = min(bisect.bisect_right(lengths, distance), len(points) - 1) - 1
+    segment = lengths[i + 1] - lengths[i]
+    t = (distance - lengths[i]) / segment if segment else 0
+    (x1, y1), (x2, y2) = points[i], points[i + 1]
+    return (x1 + (x2 - x1) * t, y1 + (y2 - y1) * t)
+
+# Function building the positions of a path ball over one lap
+def path_lap(spec):
+    """Returns the center of a path ball on every tick of one lap.
+
+    Positions are spaced evenly by arc length, so balls keep the same speed
+    around corners. A lap is rounded to a whole number of ticks, which keeps
+    the motion periodic, and laps are cached by their geometry so balls
+    sharing a path share one table.
+
+    Args:
+    spec (dict): The ball's keyword arguments. path is 'orbit', with pivot
+    and radius, or 'waypoints', with points and closed (open paths go back
+    and forth). speed (pixels per tick) or lap (ticks per lap) sets how fast
+    the ball goes, negative values go the other way.
+
+    Returns:
+    tuple: The (x, y) centers, one per tick.
+
+    Raises:
+    ValueError: If the path type is unknown.
+    """
+    kind = spec['path']
+    if kind == 'orbit':
+        geometry = (kind, tuple(spec['pivot']), spec['radius'])
+        length = 2 * math.pi * spec['radius']
+    elif kind == 'waypoints':
+        points = [tuple(point) for point in spec['points']]
+        if spec.get('closed', False):
+            points.append(points[0])
+        else:
+            points += points[-2::-1]
+        geometry = (kind, tuple(points))
+        lengths = [0]
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            lengths.append(lengths[-1] + math.hypot(x2 - x1, y2 - y1))
+        length = lengths[-1]
+    else:
+        raise ValueError(f"Unknown path type {kind!r}")
+
+    lap = spec.get('lap')
+    if lap is None:
+        speed = spec.get('speed', 0)
+        lap = length / speed if speed and length else 1
+    ticks = max(round(abs(lap)), 1)
+    key = geometry + (ticks, lap < 0)
+    if key not in PATH_CACHE:
+        step = length / ticks * (-1 if lap < 0 else 1)
+        if kind == 'orbit':
+            (x, y), radius = spec['pivot'], spec['radius']
+            angles = [step * tick / radius if radius else 0
+                      for tick in range(ticks)]
+            centers = tuple((x + radius * math.cos(angle),
+                             y + radius * math.sin(angle))
+                            for angle in angles)
+        else:
+            centers = tuple(point_along(points, lengths,
+                                        (step * tick) % length if length
+                                        else 0)
+                            for tick in range(ticks))
+        PATH_CACHE[key] = centers
+    return PATH_CACHE[key]
+
+# Function creating the balls of spokes turning around a pivot
+def spoke_specs(pivot, arms, dots, spacing, lap, **kwargs):
+    """Returns the keyword arguments of balls lined up on turning arms.
+
+    Every ball orbits the pivot in the same number of ticks, so each arm
+    turns as a straight line.
+
+    Args:
+    pivot (tuple): The (x, y) point the arms turn around.
+    arms (int): Number of arms, spread evenly around the pivot.
+    dots (int): Number of balls on each arm.
+    spacing (float): Distance between the balls of an arm.
+    lap (int): Ticks per turn, negative to turn the other way.
+    **kwargs: Other keyword arguments of every ball, like size or color.
+
+    Returns:
+    list: The keyword arguments of each ball.
+    """
+    return [dict(kwargs, path='orbit', pivot=list(pivot),
+                 radius=spacing * dot, lap=lap, offset=arm / arms)
+            for arm in range(arms) for dot in range(1, dots + 1)]
+
+# Class storing every ball of a round as columns of numbers (positions,
+# speeds, sizes and bounce limits). With numpy the balls are moved, bounced
+# and tested against the player in a few array operations per tick, without
+# it the same columns are plain lists updated in a loop. Balls bouncing at
+# constant speeds repeat their moves, so when a period is found the states
+# of one period are kept as they are first simulated and once the balls
+# repeat, every tick becomes a table lookup.
+# Balls following a path (orbits, spokes or waypoints) read their position
+# from the cached lap of their path
+class ObstacleStore:
+    # Keyword arguments of a ball that are stored as columns
+    schema = {'x', 'y', 'x_speed', 'y_speed', 'size', 'color'} | PATH_FIELDS
+
+    # Constructor for building the columns from the level's ball layout
+    def __init__(self, specs, bounce_bounds, size=24, color='blue',
+                 trajectory=None):
+        """Initializes the obstacle store.
+
+        Args:
+        specs (list): Keyword arguments for each ball (x, y and optionally
+        x_speed, y_speed, size and color, or a path as read by path_lap).
+        Other names are kept in extras.
+        bounce_bounds (tuple): Left and right limits the balls bounce between.
+        size (int): Size of the balls that don't set their own.
+        color (str): Color of the balls that don't set their own.
+        trajectory (Trajectory): Table of a previous store with the same
+        specs, to skip looking for the period again. False to not look for
+        one, when an earlier search failed.
+
+        Returns:
+        None
+        """
+        self.colors = [spec.get('color', color) for spec in specs]
+        self.shapes = [None] * len(specs) # Canvas item ids, set when drawn
+        # Custom attributes of the balls, one list per name, only holding
+        # names that some ball sets
+        self.extras = {}
+        for i, spec in enumerate(specs):
+            for name in spec.keys() - self.schema:
+                column = self.extras.setdefault(name, [None] * len(specs))
+                column[i] = spec[name]
+        columns = {
+            'x': [spec.get('x', 0) for spec in specs],
+            'y': [spec.get('y', 0) for spec in specs],
+            # Speeds are limited to the same -10 to 10 range as MovingObject,
+            # balls following a path don't use them
+            'x_speed': [0 if 'path' in spec else
+                        max(min(spec.get('x_speed', 0), 10), -10)
+                        for spec in specs],
+            'y_speed': [0 if 'path' in spec else
+                        max(min(spec.get('y_speed', 0), 10), -10)
+                        for spec in specs],
+            'size': [spec.get('size', size) for spec in specs],
+            'low': [bounce_bounds[0]] * len(specs),
+            'high': [bounce_bounds[1]] * len(specs)
+        }
+        for name, values in columns.items():
+            setattr(self, name, self._column(values))
+        # Positions before the last tick, used to interpolate drawing
+        self.prev_x = self._column(columns['x'])
+        self.prev_y = self._column(columns['y'])
+        self.tick = 0 # Number of ticks the balls have moved
+
+        # Balls following a path: their indexes, where their lap starts in
+        # the path_x and path_y columns, the ticks of their lap and how many
+        # ticks into the lap they start
+        index, start, ticks, offset, starts = [], [], [], [], {}
+        path_x, path_y = [], []
+        for i, spec in enumerate(specs):
+            if 'path' not in spec:
+                continue
+            lap = path_lap(spec)
+            if id(lap) not in starts:
+                starts[id(lap)] = len(path_x)
+                path_x.extend(x for x, y in lap)
+                path_y.extend(y for x, y in lap)
+            index.append(i)
+            start.append(starts[id(lap)])
+            ticks.append(len(lap))
+            offset.append(round(spec.get('offset', 0) * len(lap)) % len(lap))
+        self.path_x = self._column(path_x)
+        self.path_y = self._column(path_y)
+        self.path_half = self._column([columns['size'][i] / 2 for i in index])
+        if np is not None:
+            index, start, ticks, offset = (np.array(values, dtype=int)
+                                           for values in (index, start,
+                                                          ticks, offset))
+        self.path_index = index
+        self.path_start = start
+        self.path_ticks = ticks
+        self.path_offset = offset
+        # Ticks after which every path ball is back where it started
+        self.path_cycle = math.lcm(*(int(n) for n in ticks))
+        self._place_path_balls()
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+        self.trajectory = trajectory or None
+        # Whether the balls were watched for TRAJECTORY_LIMIT entries
+        # without repeating, so later rounds need not look again
+        self.aperiodic = False
+        # States seen while looking for the period, by state and phase of
+        # the path balls, and the states in tick order, until the period is
+        # found or given up
+        self._seen = self._rows = None
+        if trajectory is None:
+            if self.path_cycle > TRAJECTORY_LIMIT // max(len(self), 1):
+                self.aperiodic = True
+            else:
+                self._seen = {}
+                self._rows = []
+                self._remember()
+
+    # Static method to create a column in the available backend
+    @staticmethod
+    def _column(values):
+        """Creates a column of numbers.
+
+        Args:
+        values (list): The numbers of the column.
+
+        Returns:
+        ndarray or list: A float array with numpy, a list copy otherwise.
+        """
+        if np is not None:
+            return np.array(values, dtype=float)
+        return list(values)
+
+    def __len__(self):
+        """Returns the number of balls in the store.
+
+        Returns:
+        int: The number of balls.
+        """
+        return len(self.colors)
+
+    # Method to look for the period of the balls while they move
+    def _remember(self):
+        """Keeps the current state of the balls as a row of the trajectory
+        table, or builds the table if the state was seen before.
+
+        Looking while the balls move costs nothing up front, and rounds too
+        short to repeat never pay for a table. With numpy a state is the
+        raw bytes of the columns, which is cheap to build and to hash.
+
+        Returns:
+        None
+        """
+        if np is not None:
+            state = b''.join((self.x.tobytes(), self.y.tobytes(),
+                              self.x_speed.tobytes()))
+        else:
+            state = (tuple(self.x), tuple(self.y), tuple(self.x_speed))
+        key = (state, self.tick % self.path_cycle)
+        if key in self._seen:
+            if np is not None:
+                table = np.frombuffer(b''.join(self._rows), dtype=float)
+                table = table.reshape(self.tick, 3, len(self))
+                rows_x, rows_y, rows_speed = (table[:, 0], table[:, 1],
+                                              table[:, 2])
+            else:
+                rows_x, rows_y, rows_speed = zip(*self._rows)
+            start = self._seen[key]
+            self.trajectory = Trajectory(rows_x, rows_y, rows_speed, start,
+                                         self.tick - start)
+            self._seen = self._rows = None
+            return
+        if (self.tick + 1) * len(self) > TRAJECTORY_LIMIT:
+            # Too long to keep, the balls go on without a table
+            self._seen = self._rows = None
+            self.aperiodic = True
+            return
+        self._seen[key] = self.tick
+        self._rows.append(state)
+
+    # Method to move every ball by one tick
+    def step(self):
+        """Moves every ball by one tick, reading the new state from the
+        trajectory table when there is one.
+
+        Returns:
+        None
+        """
+        if self.trajectory is None:
+            self._integrate()
+            if self._seen is not None:
+                self._remember()
+            return
+        self.seek(self.tick + 1)
+
+    # Method to jump to the state of the balls at any tick
+    def seek(self, tick):
+        """Moves every ball to where it is after some ticks of the round.
+
+        Args:
+        tick (int): Number of ticks since the start of the round.
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If there is no trajectory table and the tick is before
+        the current one.
+        """
+        table = self.trajectory
+        if table is None:
+            if tick < self.tick:
+                raise ValueError("Can't seek backwards without a " +
+                                 "trajectory table")
+            while self.tick < tick:
+                self.step()
+            return
+        row = table.row(tick)
+        previous = table.row(tick - 1) if tick > 0 else row
+        self.prev_x[:] = table.x[previous]
+        self.prev_y[:] = table.y[previous]
+        self.x[:] = table.x[row]
+        self.y[:] = table.y[row]
+        self.x_speed[:] = table.x_speed[row]
+        self.tick = tick
+
+    # Method to move and bounce every ball by one tick
+    def _integrate(self):
+        """Moves every ball by its speed and bounces the ones that reached
+        their limits, then moves the path balls along their path.
+
+        Returns:
+        None
+        """
+        self.tick += 1
+        if np is not None:
+            self.prev_x[:] = self.x
+            self.prev_y[:] = self.y
+            self.x += self.x_speed
+            self.y += self.y_speed
+            bounced = (self.x <= self.low) | (self.x + self.size >= self.high)
+            self.x_speed[bounced] *= -1
+            self._place_path_balls()
+            return
+
+        x, y, x_speed = self.x, self.y, self.x_speed
+        self.prev_x[:] = x
+        self.prev_y[:] = y
+        for i in range(len(x)):
+            x[i] += x_speed[i]
+            y[i] += self.y_speed[i]
+            if x[i] <= self.low[i] or x[i] + self.size[i] >= self.high[i]:
+                x_speed[i] = -x_speed[i]
+        self._place_path_balls()
+
+    # Method to put the path balls where their path is at the current tick
+    def _place_path_balls(self):
+        """Moves every path ball to its position for the current tick.
+
+        Returns:
+        None
+        """
+        if not len(self.path_index):
+            return
+        if np is not None:
+            rows = (self.path_start +
+                    (self.path_offset + self.tick) % self.path_ticks)
+            self.x[self.path_index] = self.path_x[rows] - self.path_half
+            self.y[self.path_index] = self.path_y[rows] - self.path_half
+            return
+
+        for n, i in enumerate(self.path_index):
+            row = (self.path_start[n] +
+                   (self.path_offset[n] + self.tick) % self.path_ticks[n])
+            self.x[i] = self.path_x[row] - self.path_half[n]
+            self.y[i] = self.path_y[row] - self.path_half[n]
+
+    # Method to count the balls overlapping a rectangle
+    def hits(self, rect):
+        """Counts the balls whose bounding box overlaps a rectangle.
+
+        Args:
+        rect (tuple): The (left, top, right, bottom) rectangle.
+
+        Returns:
+        int: The number of overlapping balls.
+        """
+        left, top, right, bottom = rect
+        x, y, size = self.x, self.y, self.size
+        if np is not None:
+            return int(np.count_nonzero((right > x) & (left < x + size) &
+                                        (bottom > y) & (top < y + size)))
+        return sum(1 for i in range(len(x))
+                   if right > x[i] and left < x[i] + size[i] and
+                   bottom > y[i] and top < y[i] + size[i])
+
+    # Method finding the balls whose path came near a moving rectangle
+    def broadphase(self, rect, dx, dy):
+        """Finds the balls whose bounding box over the last tick overlaps
+        the box covered by a moving rectangle.
+
+        This is a cheap, conservative test; the candidates it returns still
+        need an exact check.
+
+        Args:
+        rect (tuple): The (left, top, right, bottom) rectangle at the start
+        of the tick.
+        dx (float): The x-axis movement of the rectangle over the tick.
+        dy (float): The y-axis movement of the rectangle over the tick.
+
+        Returns:
+        list: Indexes of the candidate balls.
+        """
+        left, right = min(rect[0], rect[0] + dx), max(rect[2], rect[2] + dx)
+        top, bottom = min(rect[1], rect[1] + dy), max(rect[3], rect[3] + dy)
+        x, y, prev_x, prev_y, size = (self.x, self.y, self.prev_x,
+                                      self.prev_y, self.size)
+        if np is not None:
+            return np.flatnonzero(
+                (np.minimum(x, prev_x) < right) &
+                (np.maximum(x, prev_x) + size > left) &
+                (np.minimum(y, prev_y) < bottom) &
+                (np.maximum(y, prev_y) + size > top)).tolist()
+        return [i for i in range(len(x))
+                if min(x[i], prev_x[i]) < right and
+                max(x[i], prev_x[i]) + size[i] > left and
+                min(y[i], prev_y[i]) < bottom and
+                max(y[i], prev_y[i]) + size[i] > top]
+
+    # Method to count the balls a moving rectangle touched during the tick
+    def swept_hits(self, rect, dx, dy, candidates=None):
+        """Counts the balls that overlapped a moving rectangle at any time
+        during the last tick.
+
+        The broadphase picks the balls that came near the rectangle, then
+        each of them is checked exactly as a circle moving relative to the
+        rectangle, so fast balls can't pass through it between two ticks
+        and grazing the corner of a ball's bounding box isn't a hit.
+
+        Args:
+        rect (tuple): The (left, top, right, bottom) rectangle at the start
+        of the tick.
+        dx (float): The x-axis movement of the rectangle over the tick.
+        dy (float): The y-axis movement of the rectangle over the tick.
+        candidates (list): Balls to check instead of running the
+        broadphase, when several moves from the same rectangle are checked.
+        It must hold every ball the broadphase would find.
+
+        Returns:
+        int: The number of balls touched.
+        """
+        hits = 0
+        if candidates is None:
+            candidates = self.broadphase(rect, dx, dy)
+        for i in candidates:
+            radius = float(self.size[i]) / 2
+            start_x = float(self.prev_x[i]) + radius
+            start_y = float(self.prev_y[i]) + radius
+            # Path of the center seen from the rectangle
+            end_x = float(self.x[i]) + radius - dx
+            end_y = float(self.y[i]) + radius - dy
+            if swept_circle_hits_rect(start_x, start_y, end_x, end_y, radius,
+                                      rect):
+                hits += 1
+        return hits
+
+    # Method to count the balls close to a point
+    def near(self, x, y, radius):
+        """Counts the balls whose center is within a distance of a point.
+
+        Args:
+        x (float): x-coordinate of the point.
+        y (float): y-coordinate of the point.
+        radius (float): The distance to look within.
+
+        Returns:
+        int: The number of balls closer than the radius.
+        """
+        if np is not None:
+            half = self.size / 2
+            distances = np.hypot(self.x + half - x, self.y + half - y)
+            return int(np.count_nonzero(distances < radius))
+        return sum(1 for i in range(len(self.x))
+                   if Game.calculate_distance(
+                       x, y, self.x[i] + self.size[i] / 2,
+                       self.y[i] + self.size[i] / 2) < radius)
+
+    # Method to look up a custom attribute of a ball
+    def get_extra(self, i, name, default=None):
+        """Returns a custom attribute of a ball.
+
+        Args:
+        i (int): Index of the ball.
+        name (str): The attribute name.
+        default (Any): Returned when the ball doesn't set the attribute.
+
+        Returns:
+        Any: The value of the custom attribute.
+        """
+        value = self.extras.get(name, ())
+        if i < len(value) and value[i] is not None:
+            return value[i]
+        return default
+
+    # Methods used by the renderer to place the balls
+    def bbox(self, i):
+        """Returns the bounding box of a ball.
+
+        Args:
+        i (int): Index of the ball.
+
+        Returns:
+        tuple: The (left, top, right, bottom) coordinates of the ball.
+        """
+        x, y, size = float(self.x[i]), float(self.y[i]), float(self.size[i])
+        return (x, y, x + size, y + size)
+
+    def interpolated_bbox(self, i, alpha):
+        """Returns the bounding box of a ball blended between the last two
+        ticks.
+
+        Args:
+        i (int): Index of the ball.
+        alpha (float): How far between the previous tick (0) and the current
+        tick (1) to place the ball.
+
+        Returns:
+        tuple: The (left, top, right, bottom) coordinates of the ball.
+        """
+        prev_x, prev_y = float(self.prev_x[i]), float(self.prev_y[i])
+        x = prev_x + (float(self.x[i]) - prev_x) * alpha
+        y = prev_y + (float(self.y[i]) - prev_y) * alpha
+        size = float(self.size[i])
+        return (x, y, x + size, y + size)
+
+# Class holding the simulated state of a level: the player, the obstacles,
+# the walls and the victory zone. It steps deterministically without any
+# tkinter objects, so it can run headless and the Game only has to draw it
+class World:
+    # Constructor for setting up the world for a level
+    def __init__(self, level=DEFAULT_LEVEL):
+        """Initializes the simulated world.
+
+        Args:
+        level (Level): The level geometry to simulate.
+
+        Returns:
+        None
+        """
+        self.level = level # Level geometry, shared and never modified
+        self.walls = level.walls # Wall coordinates
+        self.wall_index = level.wall_index # Index over the walls
+        self.victory_zone = level.victory_zone # End area for the player
+        self.spawn = level.spawn # Player start position
+        self.bounce_bounds = level.bounce_bounds # Ball bounce limits
+        self.ball_specs = level.ball_specs # Ball layout of the level
+        self.death_count = 0 # Players death count
+        self.recorder = None # Records the inputs of each round when set
+        self.profiler = None # Times the collision checks when set
+        # Ball trajectory table found during an earlier round, False if the
+        # balls were watched without repeating
+        self.trajectory = None
+        self.obstacles = None
+        self.reset()
+
+    # Class method to create a world with the default level
+    @classmethod
+    def create_default_world(cls):
+        """Creates a new world with the default level.
+
+        Returns:
+        World: A new instance of the World class.
+        """
+        return cls(DEFAULT_LEVEL)
+
+    # Method to put the player and the obstacles back at their start positions
+    def reset(self):
+        """Resets the player and the obstacles for a new round.
+
+        The death count is kept, so callers reset it explicitly.
+
+        Returns:
+        None
+        """
+        self.moving_objects = []
+        self.tick = 0 # Number of steps simulated this round
+        self.game_over = False # Boolean if the level is complete or not
+        self.death_ticks = [] # Ticks of this round the player died on
+        self.victory_tick = None # Tick of this round the player won on
+        if self.recorder is not None:
+            self.recorder.start()
+
+        # Add player
+        self.player = Player(*self.spawn, 31, 'red', 10, self)
+        self.add_moving_object(self.player)
+
+        # Add moving obstacles (balls)
+        if self.obstacles is not None and self.trajectory is None:
+            if self.obstacles.trajectory is not None:
+                self.trajectory = self.obstacles.trajectory
+            elif self.obstacles.aperiodic:
+                self.trajectory = False
+        self.obstacles = ObstacleStore(self.ball_specs, self.bounce_bounds,
+                                       trajectory=self.trajectory)
+
+    # Method to add a moving object (like an obstacle) to the world
+    def add_moving_object(self, obj):
+        """Adds a moving object to the world.
+
+        Args:
+        obj (MovingObject): The moving object to be added.
+
+        Returns:
+        None
+        """
+        self.moving_objects.append(obj)
+
+    # Method to advance the world by one tick
+    def step(self):
+        """Advances the player and every obstacle by one tick.
+
+        Moves the player if a direction is held, moves and bounces the balls,
+        resolves collisions and checks for victory.
+
+        Returns:
+        int: The number of deaths that happened during this tick.
+        """
+        if self.game_over:
+            return 0
+
+        deaths = 0
+        for obj in self.moving_objects:
+            obj.remember_position()
+        if self.recorder is not None:
+            self.recorder.record(self.tick, self.player.key_mask())
+        if self.player.is_moving:
+            self.player.move()
+
+        # Move the objects added one at a time
+        for obj in self.moving_objects:
+            obj.set_x(obj.get_x() + obj.x_speed)
+            obj.set_y(obj.get_y() + obj.y_speed)
+
+            if obj.shape_type != 'oval':
+                continue
+
+            (leftpos, toppos, rightpos, bottompos) = obj.bbox()
+            if leftpos <= self.bounce_bounds[0] or \
+               rightpos >= self.bounce_bounds[1]:
+                obj.x_speed = -obj.x_speed
+
+            # Check for collision with the player
+            if self.touches_object(self.player.bbox(), obj):
+                self.kill_player()
+                deaths += 1
+
+        # Move and bounce all the balls at once, then check their collisions
+        # along the paths the player and the balls took during the tick. The
+        # walls are checked once per tick, not once per ball
+        self.obstacles.step()
+        player = self.player
+        start = (player._prev_x, player._prev_y,
+                 player._prev_x + player.size, player._prev_y + player.size)
+        if self.profiler is not None:
+            checked = time.perf_counter()
+        if self.obstacles.swept_hits(start, player.get_x() - player._prev_x,
+                                     player.get_y() - player._prev_y) or \
+           self.touches_wall(player.bbox()):
+            self.kill_player()
+            deaths += 1
+        if self.profiler is not None:
+            self.profiler.add('collision', time.perf_counter() - checked)
+
+        # Proximity checking logic for collision debugging
+        if COLLISION_LOG.isEnabledFor(logging.DEBUG):
+            player_center_x = self.player.get_x() + self.player.size / 2
+            player_center_y = self.player.get_y() + self.player.size / 2
+            close = self.obstacles.near(player_center_x, player_center_y, 50)
+            if close:
+                COLLISION_LOG.debug("Tick %d: player at %s is close to %d " +
+                                    "ovals", self.tick, self.player.bbox(),
+                                    close)
+
+        if self.check_victory():
+            self.game_over = True
+            self.victory_tick = self.tick
+        self.tick += 1
+        return deaths
+
+    # Method to send the player back to the start after a collision
+    def kill_player(self):
+        """Resets the player to the starting position and counts a death.
+
+        Returns:
+        None
+        """
+        COLLISION_LOG.info("Tick %d: player died at %s", self.tick,
+                           self.player.bbox())
+        self.player.set_x(self.spawn[0])
+        self.player.set_y(self.spawn[1])
+        # Respawning is a jump, so don't slide back to the spawn
+        self.player.remember_position()
+        self.player.reduce_score()
+        self.death_count += 1
+        self.death_ticks.append(self.tick)
+
+    # Method to move the player as far as the walls let it
+    def sweep_move(self, player, dx, dy):
+        """Calculates how far the player can move before hitting a wall.
+
+        The whole path of the move is checked, so the player stops at the
+        first wall it would touch however large the move is, and then slides
+        along the wall on the axis that is still free. Each axis is limited
+        separately, so a wall ahead on one axis doesn't slow the other.
+
+        Args:
+        player (Player): The player object.
+        dx (float): The x-axis movement delta.
+        dy (float): The y-axis movement delta.
+
+        Returns:
+        tuple: The x-axis and y-axis movement the walls allow.
+        """
+        left, top, right, bottom = player.bbox()
+        walls = self.wall_index.query((min(left, left + dx),
+                                       min(top, top + dy),
+                                       max(right, right + dx),
+                                       max(bottom, bottom + dy)))
+        moved_x = moved_y = 0
+        # Move to the first contact, then what is left along each axis
+        for step_x, step_y in ((dx, dy), (dx, 0), (0, dy)):
+            step_x -= moved_x if step_x else 0
+            step_y -= moved_y if step_y else 0
+            if not step_x and not step_y:
+                continue
+            rect = (left + moved_x, top + moved_y, right + moved_x,
+                    bottom + moved_y)
+            impact = 1
+            for wall in walls:
+                time_of_impact = sweep_time(rect, step_x, step_y, wall)
+                if time_of_impact is not None and time_of_impact < impact:
+                    impact = time_of_impact
+            moved_x += step_x * impact
+            moved_y += step_y * impact
+            if impact == 1 and step_x == dx and step_y == dy:
+                break
+        return moved_x, moved_y
+
+    # Method to calculate the distance from the player to the nearest obstacle
+    # in the direction of movement
+    def distance_to_obstacle(self, player, dx, dy):
+        """Calculates the distance from the player to the nearest obstacle in
+        the direction of movement.
+
+        Args:
+        player (Player): The player object.
+        dx (int): The x-axis movement delta.
+        dy (int): The y-axis movement delta.
+
+        Returns:
+        int: The minimum distance to the nearest obstacle.
+        """
+
+        # Start with the maximum possible distance (player's speed)
+        min_distance = max(abs(dx), abs(dy))
+        player_coords = player.bbox()
+        # Only walls within reach of this move can limit it
+        reach = (player_coords[0] - min_distance,
+                 player_coords[1] - min_distance,
+                 player_coords[2] + min_distance,
+                 player_coords[3] + min_distance)
+        for wall in self.wall_index.query(reach):
+            if dx > 0:  # Moving right
+                if player_coords[2] <= wall[0] and \
+                   player_coords[3] > wall[1] and\
+                   player_coords[1] < wall[3]:
+                    min_distance = \
+                                 min(min_distance,
+                                     wall[0] - player_coords[2])
+            elif dx < 0:  # Moving left
+                if player_coords[0] >= wall[2] and \
+                   player_coords[3] > wall[1] \
+                   and player_coords[1] < wall[3]:
+                    min_distance = min(min_distance,
+                                       player_coords[0] - wall[2])
+            if dy > 0:  # Moving down
+                if player_coords[3] <= wall[1] and \
+                   player_coords[2] > wall[0] \
+                   and player_coords[0] < wall[2]:
+                    min_distance = min(min_distance,
+                                       wall[1] - player_coords[3])
+            elif dy < 0:  # Moving up
+                if player_coords[1] >= wall[3] and \
+                   player_coords[2] > wall[0] and \
+                   player_coords[0] < wall[2]:
+                    min_distance = min(min_distance,
+                                       player_coords[1] - wall[3])
+
+        return min_distance
+
+    # Method to check for collisions between the player and walls and balls
+    def check_collision(self, player, obj):
+        """Checks for collisions between the player and other objects like
+        walls and obstacles.
+
+        Args:
+        player (Player): The player object.
+        obj (MovingObject): The object to check collision with.
+
+        Returns:
+        bool: True if there is a collision, False otherwise.
+        """
+        player_coords = player.bbox()
+        
+        # Check collision with walls
+        if self.touches_wall(player_coords):
+            return True
+        
+        # Check collision with balls
+        return self.touches_object(player_coords, obj)
+
+    # Method to check if a rectangle overlaps an object, using the real
+    # shape of round objects
+    def touches_object(self, rect, obj):
+        """Checks whether a rectangle overlaps an object.
+
+        Ovals are checked as circles and other objects as rectangles.
+
+        Args:
+        rect (tuple): The (left, top, right, bottom) rectangle.
+        obj (MovingObject): The object to check.
+
+        Returns:
+        bool: True if they overlap, False otherwise.
+        """
+        obj_coords = obj.bbox()
+        if obj.shape_type == 'oval':
+            radius = obj.size / 2
+            return point_rect_distance(obj_coords[0] + radius,
+                                       obj_coords[1] + radius, rect) < radius
+        return (rect[2] > obj_coords[0] and rect[0] < obj_coords[2] and
+                rect[3] > obj_coords[1] and rect[1] < obj_coords[3])
+
+    # Method to check if a rectangle overlaps any wall
+    def touches_wall(self, rect):
+        """Checks whether a rectangle overlaps any wall of the level.
+
+        Args:
+        rect (tuple): The (left, top, right, bottom) rectangle.
+
+        Returns:
+        bool: True if the rectangle overlaps a wall, False otherwise.
+        """
+        for wall in self.wall_index.query(rect):
+            if (rect[2] > wall[0] and rect[0] < wall[2] and
+                rect[3] > wall[1] and rect[1] < wall[3]):
+                return True
+        return False
+
+    # Method to check if the player has reached the victory zone
+    def check_victory(self):
+        """Checks if the player has reached the victory zone.
+
+        Returns:
+        bool: True if the player overlaps the victory zone, False otherwise.
+        """
+        player_coords = self.player.bbox()
+        return (player_coords[2] > self.victory_zone[0] and
+                player_coords[0] < self.victory_zone[2] and
+                player_coords[3] > self.victory_zone[1] and
+                player_coords[1] < self.victory_zone[3])
+
+# Recordings store the keys held on every tick where they changed, so a
+# round can be played again exactly, without a window and as fast as the
+# simulation runs. They also store the deaths and the victory tick of the
+# round to check the replay against
+RECORDING_MAGIC = b'WHGR'
+RECORDING_VERSION = 1
+# Magic, version, ticks, number of key changes, number of deaths, victory
+# tick (-1 if the round wasn't won) and level name length
+RECORDING_HEADER = struct.Struct('<4sHIIIiH')
+RECORDING_EVENT = struct.Struct('<IB') # Tick and key mask
+
+# Class holding the inputs and the outcome of a recorded round
+class Recording:
+    # Constructor for the recording
+    def __init__(self, level_name, events, ticks, death_ticks, victory_tick):
+        """Initializes a recording.
+
+        Args:
+        level_name (str): Name of the level played.
+        events (list): (tick, key mask) pairs, for every key change.
+        ticks (int): Number of ticks the round lasted.
+        death_ticks (list): Ticks the player died on.
+        victory_tick (int): Tick the player won on, or None.
+
+        Returns:
+        None
+        """
+        self.level_name = level_name
+        self.events = events
+        self.ticks = ticks
+        self.death_ticks = death_ticks
+        self.victory_tick = victory_tick
+
+    # Method to write the recording to a file
+    def save(self, path):
+        """Saves the recording in its compact binary form.
+
+        Args:
+        path (str): The file to write.
+
+        Returns:
+        None
+        """
+        name = self.level_name.encode('utf-8')
+        victory = -1 if self.victory_tick is None else self.victory_tick
+        with open(path, 'wb') as file:
+            file.write(RECORDING_HEADER.pack(
+                RECORDING_MAGIC, RECORDING_VERSION, self.ticks,
+                len(self.events), len(self.death_ticks), victory, len(name)))
+            file.write(name)
+            for event in self.events:
+                file.write(RECORDING_EVENT.pack(*event))
+            file.write(struct.pack(f'<{len(self.death_ticks)}I',
+                                   *self.death_ticks))
+
+    # Class method to read a recording from a file
+    @classmethod
+    def load(cls, path):
+        """Loads a recording saved by save.
+
+        Args:
+        path (str): The file to read.
+
+        Returns:
+        Recording: The loaded recording.
+
+        Raises:
+        ValueError: If the file isn't a recording this version can read.
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+        (magic, version, ticks, events, deaths, victory,
+         name_length) = RECORDING_HEADER.unpack_from(data)
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            raise ValueError(f"{path} is not a version " +
+                             f"{RECORDING_VERSION} recording")
+        offset = RECORDING_HEADER.size
+        name = data[offset:offset + name_length].decode('utf-8')
+        offset += name_length
+        event_list = [RECORDING_EVENT.unpack_from(data, offset +
+                                                  i * RECORDING_EVENT.size)
+                      for i in range(events)]
+        offset += events * RECORDING_EVENT.size
+        death_ticks = list(struct.unpack_from(f'<{deaths}I', data, offset))
+        return cls(name, event_list, ticks, death_ticks,
+                   None if victory < 0 else victory)
+
+# Class recording the keys held during the rounds of a world
+class InputRecorder:
+    # Constructor for the recorder
+    def __init__(self):
+        """Initializes the input recorder.
+
+        Returns:
+        None
+        """
+        self.start()
+
+    # Method to start recording a new round
+    def start(self):
+        """Forgets the inputs recorded so far.
+
+        Returns:
+        None
+        """
+        self.events = []
+        self.mask = 0 # Keys held as of the last event
+        self.ticks = 0
+
+    # Method called by the world on every tick
+    def record(self, tick, mask):
+        """Records the keys held on a tick, if they changed.
+
+        Args:
+        tick (int): The tick about to be simulated.
+        mask (int): The keys held, as a key mask.
+
+        Returns:
+        None
+        """
+        if mask != self.mask:
+            self.events.append((tick, mask))
+            self.mask = mask
+        self.ticks = tick + 1
+
+    # Method to create the recording of the current round
+    def finish(self, world):
+        """Returns the recording of the round simulated by a world.
+
+        Args:
+        world (World): The world that was recorded.
+
+        Returns:
+        Recording: The inputs and the outcome of the round.
+        """
+        return Recording(world.level.name, list(self.events), self.ticks,
+                         list(world.death_ticks), world.victory_tick)
+
+# Function checking a level for mistakes that make it unplayable
+def validate_level(level, ticks=1000):
+    """Checks a level and simulates it with the player standing still.
+
+    Args:
+    level (Level): The level to check.
+    ticks (int): Number of ticks to simulate.
+
+    Returns:
+    tuple: The list of problems found and the world after the simulation.
+    """
+    problems = []
+    world = World(level)
+    if world.touches_wall(world.player.bbox()):
+        problems.append("player spawns inside a wall")
+    if world.check_victory():
+        problems.append("player spawns inside the victory zone")
+    low, high = level.bounce_bounds
+    for spec in level.ball_specs:
+        # Balls following a path don't bounce between the limits
+        if 'path' in spec:
+            continue
+        if spec['x'] + spec.get('size', 24) < low or spec['x'] > high:
+            problems.append(f"ball at {spec['x']}, {spec['y']} starts " +
+                            "outside its bounce limits")
+    for _ in range(ticks):
+        world.step()
+    if world.death_ticks:
+        problems.append(f"player dies standing at the spawn on tick " +
+                        f"{world.death_ticks[0]}")
+    return problems, world
+
+# Key masks the solver tries on every tick: standing still, the four
+# directions and the four diagonals
+SOLVER_MASKS = (0, 1, 2, 4, 8, 5, 9, 6, 10)
+
+# Function tabling the states of the balls over their cycle
+def obstacle_cycle(level, max_ticks=20000):
+    """Finds the states of the balls of a level until they start repeating.
+
+    Args:
+    level (Level): The level to simulate.
+    max_ticks (int): Ticks to table if the balls don't repeat before.
+
+    Returns:
+    tuple: A Trajectory with the states of the balls, the first tick of the
+    cycle and the length of the cycle, or None if the balls don't repeat
+    within max_ticks. Without a cycle the table covers max_ticks ticks and
+    holds the last of them after that.
+    """
+    store = ObstacleStore(level.ball_specs, level.bounce_bounds)
+    while store.trajectory is None and not store.aperiodic and \
+          store.tick < max_ticks:
+        store.step()
+    table = store.trajectory
+    if table is not None:
+        return table, table.start, table.length
+
+    # Table the ticks one by one instead
+    store = ObstacleStore(level.ball_specs, level.bounce_bounds,
+                          trajectory=False)
+    if np is not None:
+        rows = [np.empty((max_ticks + 1, len(store))) for _ in range(3)]
+    else:
+        rows = [[None] * (max_ticks + 1) for _ in range(3)]
+    for tick in range(max_ticks + 1):
+        if tick:
+            store.step()
+        for column, values in zip(rows, (store.x, store.y, store.x_speed)):
+            column[tick] = values if np is not None else tuple(values)
+    return Trajectory(*rows, max_ticks, 1), 0, None
+
+# Function searching for the fastest way through a level
+def solve_level(level, max_ticks=5000, max_states=100000):
+    """Searches for the fewest ticks needed to win a level without dying.
+
+    This is an A* search over the player position and the phase of the
+    balls' cycle. Two visits of the same position at the same phase of the
+    cycle lead to the same futures, so only the first one is expanded,
+    which keeps the search bounded even though time never repeats. Player
+    moves don't depend on the balls and are memoized by position and keys.
+    The balls are read from a table of their states and checked by the
+    same ObstacleStore code World.step uses.
+
+    Args:
+    level (Level): The level to solve.
+    max_ticks (int): Longest solution to look for.
+    max_states (int): Most states to expand before giving up. Without a
+    short ball cycle every tick is a new layer of states, so this is what
+    keeps the search to seconds.
+
+    Returns:
+    tuple: The winning inputs as a Recording, or None if the level can't be
+    won within max_ticks or the search gave up, and a dict of search
+    statistics.
+    """
+    world = World(level)
+    player = world.player
+    size, speed = player.size, player.speed
+    victory_zone = world.victory_zone
+    table, cycle_start, cycle_length = obstacle_cycle(level, max_ticks)
+    balls = ObstacleStore(level.ball_specs, level.bounce_bounds,
+                          trajectory=table)
+
+    def phase(tick):
+        """Returns the index of the ball states of a tick."""
+        if cycle_length is None or tick < cycle_start:
+            return tick
+        return cycle_start + (tick - cycle_start) % cycle_length
+
+    moves = {} # Memoized player moves, by position and key mask
+
+    def move(x, y, mask):
+        """Returns where the player ends up after a tick of holding keys."""
+        key = (x, y, mask)
+        if key not in moves:
+            player.set_x(x)
+            player.set_y(y)
+            player.set_key_mask(mask)
+            player.move()
+            moves[key] = (player.get_x(), player.get_y())
+        return moves[key]
+
+    def survives(x, y, new_x, new_y, near):
+        """Checks a tick of the player's move the same way World.step
+        does, against the balls near all the moves of the tick."""
+        if balls.swept_hits((x, y, x + size, y + size), new_x - x,
+                            new_y - y, near):
+            return False
+        return not world.touches_wall((new_x, new_y, new_x + size,
+                                       new_y + size))
+
+    def estimate(x, y):
+        """Returns a lower bound of the ticks left to reach victory."""
+        gap = max(victory_zone[0] - (x + size), x - victory_zone[2],
+                  victory_zone[1] - (y + size), y - victory_zone[3], 0)
+        return math.ceil(gap / speed)
+
+    start_time = time.perf_counter()
+    start = (player.get_x(), player.get_y())
+    # Nodes are (x, y, tick, key mask, parent node) so paths share memory
+    root = (start[0], start[1], 0, 0, None)
+    queue = [(estimate(*start), 0, 0, root)]
+    closed = set()
+    counter = 0
+    solution = None
+    while queue:
+        node = heapq.heappop(queue)[3]
+        x, y, tick = node[0], node[1], node[2]
+        state = (x, y, phase(tick))
+        if state in closed or tick >= max_ticks:
+            continue
+        if len(closed) >= max_states:
+            break
+        closed.add(state)
+        # One broadphase over the box covering every move of the tick
+        targets = [(mask,) + move(x, y, mask) for mask in SOLVER_MASKS]
+        if balls.tick != tick + 1:
+            balls.seek(tick + 1)
+        near = balls.broadphase((min(x, *(new[1] for new in targets)),
+                                 min(y, *(new[2] for new in targets)),
+                                 max(x, *(new[1] for new in targets)) + size,
+                                 max(y, *(new[2] for new in targets)) + size),
+                                0, 0)
+        for mask, new_x, new_y in targets:
+            if (new_x, new_y, phase(tick + 1)) in closed or \
+               not survives(x, y, new_x, new_y, near):
+                continue
+            child = (new_x, new_y, tick + 1, mask, node)
+            if new_x + size > victory_zone[0] and new_x < victory_zone[2] \
+               and new_y + size > victory_zone[1] and \
+               new_y < victory_zone[3]:
+                solution = child
+                break
+            counter += 1
+            heapq.heappush(queue, (tick + 1 + estimate(new_x, new_y),
+                                   -tick - 1, counter, child))
+        if solution is not None:
+            break
+
+    stats = {'states': len(closed), 'moves': len(moves),
+             'cycle_start': cycle_start, 'cycle_length': cycle_length,
+             'gave_up': solution is None and len(closed) >= max_states,
+             'seconds': time.perf_counter() - start_time}
+    if solution is None:
+        return None, stats
+
+    masks = []
+    while solution[4] is not None:
+        masks.append(solution[3])
+        solution = solution[4]
+    masks.reverse()
+    events = []
+    held = 0
+    for tick, mask in enumerate(masks):
+        if mask != held:
+            events.append((tick, mask))
+            held = mask
+    return Recording(level.name, events, len(masks), [],
+                     len(masks) - 1), stats
+
+# Function playing a recording back without a window
+def replay(recording, level=DEFAULT_LEVEL):
+    """Simulates a recorded round and compares the outcome.
+
+    Args:
+    recording (Recording): The recording to play back.
+    level (Level): The level the recording was made on.
+
+    Returns:
+    tuple: The recording of the replay, with the same inputs and the
+    outcome of the simulation, and whether it matches the original.
+    """
+    world = World(level)
+    events = recording.events
+    next_event = 0
+    while world.tick < recording.ticks and not world.game_over:
+        if next_event < len(events) and events[next_event][0] == world.tick:
+            world.player.set_key_mask(events[next_event][1])
+            next_event += 1
+        world.step()
+    result = Recording(level.name, events, world.tick, world.death_ticks,
+                       world.victory_tick)
+    matches = (result.death_ticks == recording.death_ticks and
+               result.victory_tick == recording.victory_tick)
+    return result, matches
+
+# Class owning every callback the game schedules on the window. Callbacks
+# are scheduled under a name and a new one replaces the pending one with the
+# same name, so no chain of callbacks can be started twice, and screen
+# changes cancel everything that is still pending
+class Scheduler:
+    # Constructor for setting up the scheduler
+    def __init__(self, window):
+        """Initializes the scheduler.
+
+        Args:
+        window (Tk): The window the callbacks run on.
+
+        Returns:
+        None
+        """
+        self.window = window
+        self.pending = {} # Tk ids of the pending callbacks, by name
+        # Statistics about the callbacks
+        self.scheduled = 0
+        self.fired = 0
+        self.cancelled = 0
+
+    def __len__(self):
+        """Returns the number of pending callbacks.
+
+        Returns:
+        int: The number of pending callbacks.
+        """
+        return len(self.pending)
+
+    # Methods to schedule named callbacks
+    def schedule(self, name, delay, callback):
+        """Runs a callback after a delay, replacing any pending callback with
+        the same name.
+
+        Args:
+        name (str): Name of the callback chain, like 'frame'.
+        delay (int): Milliseconds to wait.
+        callback (function): Called without arguments.
+
+        Returns:
+        None
+        """
+        self.cancel(name)
+        self.pending[name] = self.window.after(delay, self._fire, name,
+                                               callback)
+        self.scheduled += 1
+
+    def schedule_idle(self, name, callback):
+        """Runs a callback once Tk is idle, after drawing pending changes,
+        replacing any pending callback with the same name.
+
+        Args:
+        name (str): Name of the callback.
+        callback (function): Called without arguments.
+
+        Returns:
+        None
+        """
+        self.cancel(name)
+        self.pending[name] = self.window.after_idle(self._fire, name,
+                                                    callback)
+        self.scheduled += 1
+
+    # Method run by Tk when a callback is due
+    def _fire(self, name, callback):
+        """Forgets a callback that is due and runs it.
+
+        Args:
+        name (str): Name of the callback.
+        callback (function): The callback to run.
+
+        Returns:
+        None
+        """
+        self.pending.pop(name, None)
+        self.fired += 1
+        callback()
+
+    # Methods to cancel pending callbacks
+    def cancel(self, name):
+        """Cancels the pending callback with a name, if any.
+
+        Args:
+        name (str): Name of the callback.
+
+        Returns:
+        None
+        """
+        after_id = self.pending.pop(name, None)
+        if after_id is not None:
+            self.window.after_cancel(after_id)
+            self.cancelled += 1
+
+    def cancel_all(self):
+        """Cancels every pending callback.
+
+        Returns:
+        None
+        """
+        for name in list(self.pending):
+            self.cancel(name)
+
+    # Method to summarize the scheduler statistics
+    def report(self):
+        """Returns a summary of the callbacks scheduled.
+
+        Returns:
+        str: The scheduled, fired, cancelled and pending counts.
+        """
+        return (f"Callbacks scheduled: {self.scheduled}, " +
+                f"fired: {self.fired}, cancelled: {self.cancelled}, " +
+                f"pending: {len(self.pending)}")
+
+# Class driving the simulation at a fixed rate from the tkinter event loop.
+# Time that passes between frames is accumulated and spent in whole ticks,
+# so the game runs at the same speed however late Tk fires the callbacks
+class FixedStepLoop:
+    # Constructor for setting up the loop
+    def __init__(self, scheduler, step, render, hz=TICK_RATE, max_steps=5,
+                 profiler=None):
+        """Initializes the fixed timestep loop.
+
+        Args:
+        scheduler (Scheduler): Schedules the frames, one at a time.
+        step (function): Called once per simulation tick.
+        render (function): Called once per drawn frame with the
+        interpolation factor between the last two ticks.
+        hz (float): Number of simulation ticks per second.
+        max_steps (int): Most ticks to catch up on in a single frame.
+        profiler (Profiler): Times the ticks and renders of each frame, if
+        set.
+
+        Returns:
+        None
+        """
+        self.scheduler = scheduler
+        self.step = step
+        self.render = render
+        self.dt = 1 / hz # Length of a tick in seconds
+        self.max_steps = max_steps
+        self.profiler = profiler
+        self.running = False
+        self.accumulator = 0.0 # Time not yet simulated
+        self._last_time = 0.0 # When the previous frame ran
+        self._due_time = 0.0 # When the next frame was asked to run
+        self._skipped_last = False # Whether the previous render was skipped
+        # Statistics about the loop
+        self.ticks = 0
+        self.frames = 0
+        self.rendered_frames = 0
+        self.skipped_renders = 0
+        self.late_frames = 0
+        self.dropped_ticks = 0
+
+    # Methods to start and stop the loop
+    def start(self):
+        """Starts the loop, simulating the first tick right away.
+
+        Returns:
+        None
+        """
+        if self.running:
+            return
+        self.running = True
+        self._last_time = self._due_time = time.perf_counter()
+        self.accumulator = self.dt
+        self._frame()
+
+    def stop(self):
+        """Stops the loop after the current tick and cancels the next frame.
+
+        Returns:
+        None
+        """
+        self.running = False
+        self.scheduler.cancel('frame')
+
+    # Method to schedule the next frame
+    def _schedule(self):
+        """Schedules the next frame for when the next tick is due.
+
+        Returns:
+        None
+        """
+        delay = max(self.dt - self.accumulator, 0.001)
+        self._due_time = time.perf_counter() + delay
+        self.scheduler.schedule('frame', int(delay * 1000), self._frame)
+
+    # Method run once per frame
+    def _frame(self):
+        """Simulates the ticks that are due and draws the result.
+
+        Returns:
+        None
+        """
+        if not self.running:
+            return
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin_frame()
+        now = time.perf_counter()
+        self.frames += 1
+        # A frame that fires more than a tick after it was due is late
+        if now - self._due_time > self.dt:
+            self.late_frames += 1
+        self.accumulator += now - self._last_time
+        self._last_time = now
+
+        steps = 0
+        while self.accumulator >= self.dt and steps < self.max_steps:
+            if profiler is None:
+                self.step()
+            else:
+                profiler.measure('sim', self.step)
+            self.accumulator -= self.dt
+            self.ticks += 1
+            steps += 1
+            if not self.running:
+                return
+
+        # Too far behind to catch up, so drop the remaining ticks
+        if self.accumulator >= self.dt:
+            dropped = int(self.accumulator / self.dt)
+            self.dropped_ticks += dropped
+            self.accumulator -= dropped * self.dt
+
+        # Skip drawing when behind, but never two frames in a row
+        if steps > 1 and not self._skipped_last:
+            self.skipped_renders += 1
+            self._skipped_last = True
+        else:
+            if profiler is None:
+                self.render(self.accumulator / self.dt)
+            else:
+                profiler.measure('render', self.render,
+                                 self.accumulator / self.dt)
+            self.rendered_frames += 1
+            self._skipped_last = False
+        if profiler is not None:
+            profiler.end_frame()
+        self._schedule()
+
+    # Method to summarize the loop statistics
+    def report(self):
+        """Returns a summary of the frames run by the loop.
+
+        Returns:
+        str: The tick, frame, late frame and dropped tick counts.
+        """
+        return (f"Ticks: {self.ticks}, frames: {self.frames}, " +
+                f"rendered: {self.rendered_frames}, " +
+                f"skipped renders: {self.skipped_renders}, " +
+                f"late frames: {self.late_frames}, " +
+                f"dropped ticks: {self.dropped_ticks}")
+
+# Class turning key events into the keys held on each tick. Events only
+# update a bit mask, which the simulation reads once per tick, so repeated
+# presses and key changes within a tick cost nothing. Each change is
+# timestamped to measure how long it takes to show up on screen
+class InputLayer:
+    # Constructor for setting up the input layer
+    def __init__(self, capacity=1000):
+        """Initializes the input layer.
+
+        Args:
+        capacity (int): Number of latencies to keep.
+
+        Returns:
+        None
+        """
+        self.mask = 0 # Keys held, with one bit per key of KEY_ORDER
+        self.applied = 0 # Keys given to the simulation last
+        self.changed_at = None # When the keys first differed from applied
+        self.listener = None # Called with each change instead of polling
+        # (tick, time) of inputs the simulation used, not yet drawn
+        self.waiting = []
+        # Seconds from each input to the first frame showing it
+        self.latencies = deque(maxlen=capacity)
+        # Statistics about the events
+        self.events = 0
+        self.repeats = 0
+        self.ignored = 0
+
+    # Method to forget the keys of the previous round
+    def reset(self):
+        """Releases every key, for the start of a round.
+
+        Returns:
+        None
+        """
+        self.mask = self.applied = 0
+        self.changed_at = None
+        self.waiting.clear()
+
+    # Event handlers for key press and release
+    def key_down(self, event: Event):
+        """Handles a key press, ignoring unknown keys and the repeated presses
+        of a key that is held.
+
+        Args:
+        event (Event): The key press event containing the key symbol.
+
+        Returns:
+        None
+        """
+        self.events += 1
+        if event.keysym not in KEY_ORDER:
+            self.ignored += 1
+            return
+        bit = 1 << KEY_ORDER.index(event.keysym)
+        if self.mask & bit:
+            self.repeats += 1
+            return
+        self._change(self.mask | bit)
+
+    def key_up(self, event: Event):
+        """Handles a key release, ignoring unknown keys.
+
+        Autorepeat that sends a release and a press together is absorbed
+        because the simulation only sees the keys held when a tick starts.
+
+        Args:
+        event (Event): The key release event containing the key symbol.
+
+        Returns:
+        None
+        """
+        self.events += 1
+        if event.keysym not in KEY_ORDER:
+            self.ignored += 1
+            return
+        bit = 1 << KEY_ORDER.index(event.keysym)
+        if self.mask & bit:
+            self._change(self.mask & ~bit)
+
+    # Method to record a change of the keys held
+    def _change(self, mask):
+        """Updates the keys held and timestamps the change.
+
+        Args:
+        mask (int): The new keys held.
+
+        Returns:
+        None
+        """
+        self.mask = mask
+        now = time.perf_counter()
+        if self.listener is not None:
+            self.listener(mask, now)
+        elif mask == self.applied:
+            self.changed_at = None
+        elif self.changed_at is None:
+            self.changed_at = now
+
+    # Method run by the simulation once per tick
+    def poll(self, tick):
+        """Returns the keys to apply on a tick, if they changed.
+
+        Args:
+        tick (int): The tick about to be simulated.
+
+        Returns:
+        int: The keys held, or None if they didn't change since the last
+        poll.
+        """
+        if self.mask == self.applied:
+            return None
+        self.applied = self.mask
+        self.waiting.append((tick, self.changed_at))
+        self.changed_at = None
+        return self.applied
+
+    # Method run after drawing a frame
+    def frame_drawn(self, tick):
+        """Records the latency of the inputs shown by a frame.
+
+        Args:
+        tick (int): Number of ticks simulated before the frame was drawn.
+
+        Returns:
+        None
+        """
+        if not self.waiting:
+            return
+        now = time.perf_counter()
+        shown = [stamp for used, stamp in self.waiting if used < tick]
+        self.waiting = [entry for entry in self.waiting if entry[0] >= tick]
+        self.latencies.extend(now - stamp for stamp in shown)
+
+    # Method to summarize the input latencies
+    def report(self):
+        """Returns the input latency percentiles and event counts.
+
+        Returns:
+        str: The summary.
+        """
+        counts = (f"events: {self.events}, repeats ignored: " +
+                  f"{self.repeats}, unknown keys: {self.ignored}")
+        if not self.latencies:
+            return "Input latency: no inputs, " + counts
+        latencies = [latency * 1000 for latency in self.latencies]
+        return (f"Input latency: p50 {percentile(latencies, 0.5):.1f} ms, " +
+                f"p95 {percentile(latencies, 0.95):.1f} ms, " +
+                f"p99 {percentile(latencies, 0.99):.1f} ms, " + counts)
+
+# Class holding a copy of what the renderer needs from the world after a
+# tick. The version is odd while the copy is being written, so a reader on
+# another thread can tell a finished copy from a torn one without a lock
+class Snapshot:
+    # Constructor for the buffers of a round
+    def __init__(self, world):
+        """Initializes an empty snapshot sized for the balls of a world.
+
+        Args:
+        world (World): The world the snapshots are taken of.
+
+        Returns:
+        None
+        """
+        self.version = 0 # Number of writes started and finished
+        self.time = 0.0 # When the snapshot was taken
+        self.tick = 0
+        self.prev_player = (0, 0, 0, 0) # Player box before the tick
+        self.player = (0, 0, 0, 0) # Player box after the tick
+        count = len(world.obstacles)
+        self.prev_x = ObstacleStore._column([0.0] * count)
+        self.prev_y = ObstacleStore._column([0.0] * count)
+        self.x = ObstacleStore._column([0.0] * count)
+        self.y = ObstacleStore._column([0.0] * count)
+        self.death_count = 0
+        self.game_over = False
+        # Seconds the worker spent so far in ticks and in collision checks,
+        # while the profiler is enabled
+        self.sim_time = 0.0
+        self.collision_time = 0.0
+
+    # Method run by the simulation thread to fill the snapshot
+    def capture(self, world, sim_time=0.0, collision_time=0.0):
+        """Copies the state of a world into the snapshot.
+
+        Args:
+        world (World): The world to copy.
+        sim_time (float): Seconds spent in ticks so far.
+        collision_time (float): Seconds spent in collision checks so far.
+
+        Returns:
+        None
+        """
+        self.version += 1
+        player, obstacles = world.player, world.obstacles
+        self.time = time.perf_counter()
+        self.tick = world.tick
+        self.prev_player = player.interpolated_bbox(0)
+        self.player = player.bbox()
+        self.prev_x[:] = obstacles.prev_x
+        self.prev_y[:] = obstacles.prev_y
+        self.x[:] = obstacles.x
+        self.y[:] = obstacles.y
+        self.death_count = world.death_count
+        self.game_over = world.game_over
+        self.sim_time = sim_time
+        self.collision_time = collision_time
+        self.version += 1
+
+    # Method run by the Tk thread to read the snapshot
+    def read(self):
+        """Returns a consistent copy of the snapshot, waiting out a write in
+        progress.
+
+        Returns:
+        tuple: The time, tick, player boxes before and after the tick, ball
+        x and y before and after the tick, death count, game over flag and
+        the seconds spent in ticks and in collision checks so far.
+        """
+        while True:
+            version = self.version
+            if version % 2 == 0:
+                state = (self.time, self.tick, self.prev_player, self.player,
+                         self.prev_x.copy(), self.prev_y.copy(),
+                         self.x.copy(), self.y.copy(), self.death_count,
+                         self.game_over, self.sim_time, self.collision_time)
+                if self.version == version:
+                    return state
+            time.sleep(0)
+
+# Class running the simulation on a worker thread. The Tk thread forwards key
+# presses through a queue and draws the latest of two snapshots, which the
+# worker fills in turns, so slow frames don't delay the ticks or the input
+class SimulationThread:
+    # Constructor for setting up the thread
+    def __init__(self, world, hz=TICK_RATE):
+        """Initializes the simulation thread.
+
+        Args:
+        world (World): The world to simulate. Only the worker touches it
+        while the thread runs.
+        hz (float): Number of simulation ticks per second.
+
+        Returns:
+        None
+        """
+        self.world = world
+        self.dt = 1 / hz # Length of a tick in seconds
+        # (key mask, time) changes sent by the Tk thread
+        self.inputs = queue.SimpleQueue()
+        # (tick, time) of the inputs applied, for the Tk thread to time
+        self.applied = queue.SimpleQueue()
+        self.buffers = None # The two snapshots, made for each round
+        self.front = None # The latest finished snapshot
+        self.thread = None
+        self.running = False
+        # Times the ticks of the worker, and the collision checks of the
+        # world through World.profiler. Only the worker records into it, the
+        # totals reach the Tk thread through the snapshots
+        self.profiler = Profiler(capacity=1)
+        world.profiler = self.profiler
+        self.sim_time = 0.0
+        self.collision_time = 0.0
+        # Statistics about the thread
+        self.ticks = 0
+        self.late_ticks = 0
+
+    # Methods to start and stop the thread
+    def start(self):
+        """Starts simulating the current round of the world.
+
+        Returns:
+        None
+        """
+        if self.running:
+            return
+        self.buffers = (Snapshot(self.world), Snapshot(self.world))
+        self.buffers[0].capture(self.world, self.sim_time,
+                                self.collision_time)
+        self.front = self.buffers[0]
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stops the thread and waits for its current tick to end.
+
+        Returns:
+        None
+        """
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    # Method run on the Tk thread to pass on the keys held
+    def send(self, mask, stamp):
+        """Queues the keys held for the next tick.
+
+        Args:
+        mask (int): The keys held, with one bit per key of KEY_ORDER.
+        stamp (float): When the keys changed.
+
+        Returns:
+        None
+        """
+        self.inputs.put((mask, stamp))
+
+    # Method run by the worker thread
+    def _run(self):
+        """Steps the world at a fixed rate until the round ends or the thread
+        is stopped, publishing a snapshot after every tick.
+
+        Returns:
+        None
+        """
+        world = self.world
+        profiler = self.profiler
+        due = time.perf_counter()
+        while self.running:
+            # Only the keys held at the start of the tick count
+            mask = stamp = None
+            while not self.inputs.empty():
+                mask, sent = self.inputs.get()
+                stamp = sent if stamp is None else stamp
+            if mask is not None and mask != world.player.key_mask():
+                world.player.set_key_mask(mask)
+                self.applied.put((world.tick, stamp))
+            profiler.begin_frame()
+            timings = profiler.current
+            profiler.measure('sim', world.step)
+            profiler.end_frame()
+            if timings is not None:
+                self.sim_time += timings['sim']
+                self.collision_time += timings['collision']
+            self.ticks += 1
+            # Fill the snapshot the Tk thread isn't reading, then swap
+            back = self.buffers[self.front is self.buffers[0]]
+            back.capture(world, self.sim_time, self.collision_time)
+            self.front = back
+            if world.game_over:
+                self.running = False
+                break
+
+            due += self.dt
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.late_ticks += 1
+                # Too far behind to catch up, so start counting from now
+                if delay < -5 * self.dt:
+                    due = time.perf_counter()
+
+    # Method to get the latest state for drawing
+    def latest(self):
+        """Returns a consistent copy of the latest snapshot.
+
+        Returns:
+        tuple: The snapshot data, as returned by Snapshot.read.
+        """
+        return self.front.read()
+
+# Class timing the phases of each frame. Like RingBufferHandler does for log
+# records, it keeps the last frames in a ring buffer that can be dumped to a
+# file, and it costs almost nothing while disabled
+class Profiler:
+    # Constructor for setting up the ring buffer
+    def __init__(self, capacity=600):
+        """Initializes the profiler.
+
+        Args:
+        capacity (int): Number of frames to keep.
+
+        Returns:
+        None
+        """
+        self.frames = deque(maxlen=capacity) # Timings of the last frames
+        self.enabled = False # Whether frames are being recorded
+        self.current = None # Timings of the frame being recorded
+
+    # Methods to mark the start and end of a frame
+    def begin_frame(self):
+        """Starts recording a new frame, if the profiler is enabled.
+
+        Returns:
+        None
+        """
+        if self.enabled:
+            self.current = {'start': time.perf_counter(), 'sim': 0.0,
+                            'render': 0.0, 'collision': 0.0, 'calls': 0}
+
+    def end_frame(self):
+        """Stores the frame being recorded in the ring buffer.
+
+        Returns:
+        None
+        """
+        if self.current is not None:
+            self.frames.append(self.current)
+            self.current = None
+
+    # Methods to add measurements to the current frame
+    def add(self, phase, amount):
+        """Adds time or a count to a phase of the current frame.
+
+        Args:
+        phase (str): 'sim', 'render' or 'collision' for times in seconds,
+        'calls' for Tcl calls. Collision time is part of the sim time.
+        amount (float): The amount to add.
+
+        Returns:
+        None
+        """
+        if self.current is not None:
+            self.current[phase] += amount
+
+    def measure(self, phase, func, *args):
+        """Calls a function and adds the time it took to a phase.
+
+        Args:
+        phase (str): The phase the call belongs to.
+        func (function): The function to call.
+        *args: Arguments for the function.
+
+        Returns:
+        Any: What the function returned.
+        """
+        if self.current is None:
+            return func(*args)
+        start = time.perf_counter()
+        result = func(*args)
+        self.current[phase] += time.perf_counter() - start
+        return result
+
+    # Method to average the last frames
+    def summary(self, count=30):
+        """Averages the timings of the last frames.
+
+        Args:
+        count (int): Number of frames to average.
+
+        Returns:
+        dict: The frames per second, the sim, render and collision times in
+        milliseconds and the Tcl calls per frame, or None without frames.
+        """
+        frames = list(self.frames)[-count:]
+        if not frames:
+            return None
+        elapsed = frames[-1]['start'] - frames[0]['start']
+        result = {'fps': (len(frames) - 1) / elapsed if elapsed else 0.0}
+        for phase in ('sim', 'render', 'collision'):
+            result[phase + '_ms'] = (sum(frame[phase] for frame in frames) *
+                                     1000 / len(frames))
+        result['calls'] = sum(frame['calls'] for frame in frames) / len(frames)
+        return result
+
+    # Method to describe the last frames in one line
+    def describe(self):
+        """Returns the averages of the last frames as a line of text.
+
+        Returns:
+        str: The line shown by the overlay.
+        """
+        numbers = self.summary()
+        if numbers is None:
+            return "FPS --"
+        return (f"FPS {numbers['fps']:4.1f}  " +
+                f"sim {numbers['sim_ms']:5.2f} ms  " +
+                f"render {numbers['render_ms']:5.2f} ms  " +
+                f"collision {numbers['collision_ms']:5.2f} ms  " +
+                f"calls {numbers['calls']:4.1f}")
+
+    # Method to save the kept frames
+    def dump(self, path):
+        """Writes the kept frames to a JSON file.
+
+        Args:
+        path (str): The file to write.
+
+        Returns:
+        None
+        """
+        with open(path, 'w') as file:
+            json.dump(list(self.frames), file, indent=1)
+
+# Class moving canvas items for the renderer. Positions are collected during
+# a frame and only the items whose coordinates changed since they were last
+# drawn are updated, with a single coords call each
+class CanvasRenderer:
+    # Constructor for setting up the renderer
+    def __init__(self, canvas):
+        """Initializes the renderer.
+
+        Args:
+        canvas (Canvas): The canvas holding the items.
+
+        Returns:
+        None
+        """
+        self.canvas = canvas
+        self.drawn = {} # Last coordinates sent to the canvas for each item
+        self.pending = {} # Coordinates to send at the end of the frame
+        self.updates = 0 # Number of coords calls made
+        self.skipped = 0 # Number of moves that didn't change anything
+
+    # Method to queue a new position for an item
+    def move(self, item, coords):
+        """Queues new coordinates for a canvas item.
+
+        Args:
+        item (int): The canvas item id.
+        coords (tuple): The new coordinates of the item.
+
+        Returns:
+        None
+        """
+        if self.drawn.get(item) == coords:
+            self.pending.pop(item, None)
+            self.skipped += 1
+        else:
+            self.pending[item] = coords
+
+    # Method to send the queued positions to the canvas
+    def flush(self):
+        """Updates the canvas items that changed during the frame.
+
+        Returns:
+        int: The number of items updated.
+        """
+        count = len(self.pending)
+        for item, coords in self.pending.items():
+            self.canvas.coords(item, *coords)
+            self.drawn[item] = coords
+        self.pending.clear()
+        self.updates += count
+        return count
+
+    # Method to drop the remembered positions when items are deleted
+    def forget(self):
+        """Forgets every item, for when the canvas is cleared.
+
+        Returns:
+        None
+        """
+        self.drawn.clear()
+        self.pending.clear()
+
+# Image files of the screens, by key
+ASSETS = {'title': 'title.png'}
+# Images the first screen draws. They are decoded as soon as the screen is
+# built, so reading them ahead on another thread would only race that
+STARTUP_ASSETS = ('title',)
+
+# Class loading the images of the game once and sharing them between screens.
+# Files can be read ahead on a background thread, but Tk images can only be
+# created on the Tk thread, so they are decoded the first time they are used
+class AssetCache:
+    # Constructor for setting up the cache
+    def __init__(self, window, paths=ASSETS):
+        """Initializes the asset cache.
+
+        Args:
+        window (Tk): The window the images belong to.
+        paths (dict): Image files, by key.
+
+        Returns:
+        None
+        """
+        self.window = window
+        self.paths = dict(paths)
+        self.images = {} # Decoded images, by key
+        self.data = {} # Contents of the files read ahead, by key
+        self.decoded = 0 # Number of images decoded
+
+    # Method to read image files ahead of their use
+    def preload(self, *keys):
+        """Reads image files on a background thread, so that using them
+        later doesn't wait for the disk.
+
+        Args:
+        *keys: Keys of the images to read, all of them if none are given.
+
+        Returns:
+        Thread: The thread reading the files.
+        """
+        keys = [key for key in keys or self.paths
+                if key not in self.images and key not in self.data]
+        thread = threading.Thread(target=self._read, args=(keys,),
+                                  daemon=True)
+        thread.start()
+        return thread
+
+    # Method run by the background thread
+    def _read(self, keys):
+        """Reads image files into memory.
+
+        Files that can't be read are left for image to report.
+
+        Args:
+        keys (list): Keys of the images to read.
+
+        Returns:
+        None
+        """
+        for key in keys:
+            try:
+                with open(self.paths[key], 'rb') as file:
+                    data = file.read()
+            except OSError:
+                continue
+            # The image may have been decoded from the file meanwhile
+            if key not in self.images:
+                self.data[key] = data
+
+    # Method to get an image, decoding it the first time
+    def image(self, key):
+        """Returns an image, decoding it the first time it is asked for.
+
+        Args:
+        key (str): Key of the image.
+
+        Returns:
+        PhotoImage: The shared image.
+        """
+        if key not in self.images:
+            data = self.data.pop(key, None)
+            if data is None:
+                image = PhotoImage(master=self.window, file=self.paths[key])
+            else:
+                image = PhotoImage(master=self.window, data=data)
+            self.images[key] = image
+            self.decoded += 1
+        return self.images[key]
+
+# Class keeping the screens of the game on the canvas. Each screen is built
+# the first time it is shown, with all of its items tagged 'static' and its
+# own name, so clearing the canvas keeps them and showing a screen again only
+# changes the state of its items
+class SceneManager:
+    # Constructor for setting up the scene manager
+    def __init__(self, canvas):
+        """Initializes the scene manager.
+
+        Args:
+        canvas (Canvas): The canvas holding the screens.
+
+        Returns:
+        None
+        """
+        self.canvas = canvas
+        self.builders = {} # Functions creating the items of each screen
+        self.built = set() # Names of the screens whose items exist
+
+    # Method to register a screen
+    def add(self, name, build):
+        """Registers a screen.
+
+        Args:
+        name (str): Name of the screen, also the tag of its items.
+        build (function): Creates the items of the screen, called once with
+        the tags to give them.
+
+        Returns:
+        None
+        """
+        self.builders[name] = build
+
+    # Method to show a screen
+    def show(self, name):
+        """Shows a screen above the other items, building it if needed.
+
+        Args:
+        name (str): Name of the screen.
+
+        Returns:
+        None
+        """
+        self.build(name)
+        self.canvas.itemconfigure(name, state='normal')
+        self.canvas.tag_raise(name)
+
+    # Method to build a screen without showing it
+    def build(self, name):
+        """Builds a screen, hidden, if it wasn't built yet.
+
+        Args:
+        name (str): Name of the screen.
+
+        Returns:
+        bool: True if the screen was built by this call.
+        """
+        if name in self.built:
+            return False
+        self.builders[name](('static', name))
+        self.built.add(name)
+        self.canvas.itemconfigure(name, state='hidden')
+        return True
+
+# Main game class handling the game logic and UI
+class Game:
+    # Sets initial high score of the player to 0
+    high_score = 0
+    # Constructor for setting up the game window, canvas, and initial game state
+    def __init__(self, width, height, tick_rate=TICK_RATE,
+                 level=DEFAULT_LEVEL, threaded=False):
+        """Initializes the game environment.
+
+        Args:
+        width (int): Width of the game window.
+        height (int): Height of the game window.
+        tick_rate (float): Number of simulation ticks per second.
+        level (Level): The level to play.
+        threaded (bool): Whether to simulate on a worker thread, the Tk
+        thread then only handles input and drawing.
+
+        Returns:
+        None
+        """
+        self.window = Tk() # Initializes window
+        self.window.title("World's Hardest Game") # Sets a title for the window
+        # Disallows the user from changing the window size
+        self.window.resizable(False, False)
+        # Creates the canvas
+        self.canvas = Canvas(self.window, width=width, height=height,
+                             bg='black')
+        self.canvas.pack(fill='both', expand=True)
+        # Renderer only updating the canvas items that moved
+        self.renderer = CanvasRenderer(self.canvas)
+        # Images of the screens. Those of the later screens are read from
+        # disk while the first one is set up and shown
+        self.assets = AssetCache(self.window)
+        later = [key for key in ASSETS if key not in STARTUP_ASSETS]
+        if later:
+            self.assets.preload(*later)
+        self.first_frame_time = None # Seconds from start to the first frame
+        self.expose_binding = None # Binding waiting for the first frame
+        # Named fonts shared by every screen
+        self.fonts = {'title': Font(self.window, family='Arial', size=50),
+                      'heading': Font(self.window, family='Arial', size=24),
+                      'text': Font(self.window, family='Arial', size=18),
+                      'button': Font(self.window, family='Arial', size=16),
+                      'overlay': Font(self.window, family='Courier', size=10)}
+        # Screens of the game, built once and shown again when needed
+        self.scenes = SceneManager(self.canvas)
+        self.scenes.add('start', self.build_start_screen)
+        self.scenes.add('rules', self.build_rules_screen)
+        self.scenes.add('board', self.draw_background)
+        self.scenes.add('victory', self.build_victory_screen)
+        self.level = level # Geometry of the level being played
+        self.walls = self.level.walls # Wall coordinates of the level
+        # Simulated state of the level, the game only draws it
+        self.world = World(self.level)
+        self.recording_path = None # Where to save recorded inputs, if set
+        self.recorded_rounds = 0 # Number of rounds saved, to name the files
+        # Frame timings shown by the overlay toggled with F3
+        self.profiler = Profiler()
+        self.world.profiler = self.profiler
+        self.profiler_disp = None # Overlay text, created with each round
+        self.profiler_shown = 0.0 # When the overlay text was last updated
+        self.window.bind('<F3>', self.toggle_profiler)
+        # Owner of every callback scheduled on the window
+        self.scheduler = Scheduler(self.window)
+        # Loop advancing the world at a fixed rate
+        self.loop = FixedStepLoop(self.scheduler, self.tick, self.render,
+                                  tick_rate, profiler=self.profiler)
+        # Worker thread simulating the world instead of the loop, if used
+        self.simulation = None
+        if threaded:
+            # The worker times the world with a profiler of its own
+            self.simulation = SimulationThread(self.world, tick_rate)
+        self.deaths_shown = 0 # Death count last drawn in threaded mode
+        # Worker sim and collision seconds already added to the profiler
+        self.simulated = (0.0, 0.0)
+        # Keys held on each tick, read by the loop or sent to the thread
+        self.input = InputLayer()
+        if self.simulation is not None:
+            self.input.listener = self.simulation.send
+        # Adds a death counter
+        self.death_counter_disp = self.canvas.create_text(
+            850, 26, text="DEATHS: 0", fill="white",
+            font=self.fonts['heading'])
+        # Adds the end area for the player
+        self.victory_zone = self.level.victory_zone
+        # Boolean if the game is complete or not
+        self.game_over = False
+        self.show_start_screen()
+
+    # Properties exposing the simulated player and state of the world
+    @property
+    def player(self):
+        """Gets the player of the current round.
+
+        Returns:
+        Player: The simulated player.
+        """
+        return self.world.player
+
+    @property
+    def moving_objects(self):
+        """Gets the moving objects of the current round.
+
+        Returns:
+        list: The simulated player and obstacles.
+        """
+        return self.world.moving_objects
+
+    @property
+    def death_count(self):
+        """Gets the players death count.
+
+        Returns:
+        int: The number of deaths so far.
+        """
+        return self.world.death_count
+
+    @death_count.setter
+    def death_count(self, value):
+        """Sets the players death count.
+
+        Args:
+        value (int): The new death count.
+
+        Returns:
+        None
+        """
+        self.world.death_count = value
+
+    # Class method to create a game instance with default settings
+    @classmethod
+    def create_default_game(cls):
+        """Creates a new game instance with default settings.
+
+        Returns:
+        Game: A new instance of the Game class.
+        """
+        return cls(1024, 644)
+    
+    # Method to clear the canvas for a new screen
+    def clear_canvas(self):
+        """Removes everything from the canvas except the screens, which are
+        hidden instead so they can be shown again without redrawing.
+
+        Every screen starts here, so the game loop and any other pending
+        callbacks of the previous screen are cancelled too.
+
+        Returns:
+        None
+        """
+        self.loop.stop()
+        if self.simulation is not None:
+            self.simulation.stop()
+        self.scheduler.cancel_all()
+        self.canvas.delete('!static')
+        self.canvas.itemconfigure('static', state='hidden')
+        self.renderer.forget()
+
+    # Method to display the start screen of the game
+    def show_start_screen(self):
+        """Displays the start screen of the game.
+
+        Initializes and shows the game's start screen, including the title and
+        start button.
+
+        Returns:
+        None
+        """
+        self.clear_canvas()
+        self.scenes.show('start')
+        # Build the next screens while the player looks at this one
+        self.scheduler.schedule('preload', 1, self.preload_screens)
+
+    # Method to build the screens that aren't built yet, one per callback
+    def preload_screens(self):
+        """Builds the next screen that isn't built yet, hidden, and schedules
+        the following one, so the window stays responsive meanwhile.
+
+        Returns:
+        None
+        """
+        for name in ('rules', 'board', 'victory'):
+            if self.scenes.build(name):
+                self.scheduler.schedule('preload', 1, self.preload_screens)
+                return
+
+    # Method to create the items of the start screen
+    def build_start_screen(self, tags):
+        """Creates the title and start button of the start screen.
+
+        Args:
+        tags (tuple): Tags to give every item of the screen.
+
+        Returns:
+        None
+        """
+        # Add the title image
+        self.start_image = self.assets.image('title')
+
+        # Create the background
+        self.canvas.create_rectangle(0, 49, 1026, 646, fill='#b4b6fe',
+                                     tags=tags)
+        # Display the title
+        self.canvas.create_image(512, 322, image=self.start_image,
+                                 anchor='center', tags=tags)
+        # Create a Play Game button
+        start_button = Button(self.canvas, text="Play Game",
+                              command=self.show_rules_screen,
+                              font=self.fonts['button'], padx=20, pady=10)
+        self.canvas.create_window(512, 500, window=start_button, tags=tags)
+
+    # Method to display the game's rules screen    
+    def show_rules_screen(self):
+        """Displays the game rules screen.
+
+        Shows the screen with instructions and rules of the game.
+
+        Returns:
+        None
+        """
+        self.clear_canvas()
+        self.scenes.show('rules')
+
+    # Method to create the items of the rules screen
+    def build_rules_screen(self, tags):
+        """Creates the rules text and play button of the rules screen.
+
+        Args:
+        tags (tuple): Tags to give every item of the screen.
+
+        Returns:
+        None
+        """
+        font = self.fonts['heading']
+        # Create the background
+        self.canvas.create_rectangle(0, 0, 1026, 646, fill='#b4b6fe',
+                                     tags=tags)
+
+        # Create the rules text with highlighted colors
+        self.canvas.create_text(386, 100, text="You are the", fill="black",
+                                font=font, tags=tags)
+        self.canvas.create_text(555, 100, text="red", fill="red",
+                                font=font, tags=tags)
+        self.canvas.create_text(682, 100, text="square.", fill="black",
+                                font=font, tags=tags)
+        self.canvas.create_text(380, 180, text="Avoid the", fill="black",
+                                font=font, tags=tags)
+        self.canvas.create_text(538, 180, text="blue", fill="blue",
+                                font=font, tags=tags)
+        self.canvas.create_text(670, 180, text="circles.", fill="black",
+                                font=font, tags=tags)
+        self.canvas.create_text(512, 260,
+                                text="Move to the green area to complete" +
+                                " the level.", fill="black", font=font,
+                                tags=tags)
+        self.canvas.create_text(155, 260, text="Move to the", fill="black",
+                                font=font, tags=tags)
+        self.canvas.create_text(356, 260, text="green", fill="green",
+                                font=font, tags=tags)
+        self.canvas.create_text(712, 260, text="area to complete the level.",
+                                fill="black", font=font, tags=tags)
+        self.canvas.create_text(512, 340,
+                                text="The less times you die, the better.",
+                                fill="black", font=font, tags=tags)
+
+        # Create a "Play" button to start the game
+        play_button = Button(self.canvas, text="Play Game",
+                             command=self.start_game,
+                             font=self.fonts['button'], padx=20, pady=10)
+        self.canvas.create_window(512, 500, window=play_button, tags=tags)
+    
+    # Method to initialize game elements like the player, obstacles,
+    # death counter, etc.
+    def initialize_game_elements(self):
+        """Initializes all game elements for a new game session.
+
+        Sets up the player, obstacles, and other game elements to their initial
+        state.
+
+        Returns:
+        None
+        """
+        self.clear_canvas()
+        self.create_background()
+        # Put the player and the balls back at their start positions
+        self.world.reset()
+        for obj in self.moving_objects:
+            self.draw_object(obj)
+        self.draw_obstacles()
+        
+        # Display the death counter
+        self.death_counter_disp = self.canvas.create_text(850, 26,
+                                                          text=f"DEATHS: "+
+                                                          f"{self.death_count}",
+                                                          fill="white",
+                                                          font=self.fonts[
+                                                              'heading'])
+        # Display the profiler overlay left of the death counter
+        self.profiler_disp = self.canvas.create_text(
+            740, 26, anchor='e', text=self.profiler.describe(), fill="yellow",
+            font=self.fonts['overlay'],
+            state='normal' if self.profiler.enabled else 'hidden')
+        
+        # Rebind the key events, starting the round with no keys held
+        self.input.reset()
+        self.window.bind('<KeyPress>', self.input.key_down)
+        self.window.bind('<KeyRelease>', self.input.key_up)
+        
+        self.game_over = False
+          
+    # Method to start the game, setting up the game elements and beginning the
+    # animation loop 
+    def start_game(self):
+        """Starts the game.
+
+        Triggers the beginning of the game, including setting up the
+        environment and starting the animation loop.
+
+        Returns:
+        None
+        """
+        self.initialize_game_elements()
+        self.window.bind('<KeyPress>', self.input.key_down)
+        self.window.bind('<KeyRelease>', self.input.key_up)
+        self.animate()
+        
+    # Method to create the game's background, including the grid, start and
+    # end zones   
+    def create_background(self):
+        """Shows the game's background environment.
+
+        The background, grid, start/end zones and walls never change, so they
+        are drawn once as the 'board' screen and only shown again for the next
+        rounds, below the player and the balls.
+
+        Returns:
+        None
+        """
+        self.scenes.show('board')
+        self.canvas.tag_lower('board')
+
+    # Method to draw the static layer of the game screen
+    def draw_background(self, tags=('static', 'board')):
+        """Draws the background, grid, and start/end zones for the game.
+
+        Args:
+        tags (tuple): Tags to give every item of the background.
+
+        Returns:
+        None
+        """
+        # Create a purple rectangle as the background of the game area
+        self.canvas.create_rectangle(0, 49, 1026, 646, fill='#b4b6fe',
+                                     tags=tags)
+
+        # Create a grid of squares for the player to move in
+        for x, y, size, shade in self.level.floor:
+            self.canvas.create_rectangle(x, y, x + size, y + size,
+                                         fill=FLOOR_COLORS[shade],
+                                         outline='', tags=tags)
+        
+        # Start and end zones
+        for zone in self.level.zones:
+            self.canvas.create_rectangle(*zone, fill=ZONE_COLOR, outline='',
+                                         tags=tags)
+        
+        # Loop to add walls as a perimeter of the map
+        for coords in self.walls:
+            self.canvas.create_rectangle(*coords, fill="black", outline='',
+                                         tags=tags)
+
+    # Method to add a moving object (like an obstacle) to the game
+    def add_moving_object(self, obj):
+        """Adds a moving object to the game and draws it.
+
+        Args:
+        obj (MovingObject): The moving object to be added.
+
+        Returns:
+        None
+        """
+        self.world.add_moving_object(obj)
+        self.draw_object(obj)
+
+    # Method to create the canvas item for a moving object
+    def draw_object(self, obj):
+        """Creates the canvas item representing a moving object.
+
+        Args:
+        obj (MovingObject): The object to draw.
+
+        Returns:
+        None
+        """
+        if obj.shape_type == 'oval':
+            obj.shape = self.canvas.create_oval(*obj.bbox(), fill=obj.color)
+        else:
+            obj.shape = self.canvas.create_rectangle(*obj.bbox(),
+                                                     fill=obj.color)
+
+    # Method to create the canvas items for the balls of the world
+    def draw_obstacles(self):
+        """Creates the canvas items representing the balls.
+
+        Returns:
+        None
+        """
+        obstacles = self.world.obstacles
+        for i in range(len(obstacles)):
+            obstacles.shapes[i] = self.canvas.create_oval(
+                *obstacles.bbox(i), fill=obstacles.colors[i])
+
+    # Method to draw the current state of the world
+    def render(self, alpha=1.0):
+        """Moves the canvas items to the positions held by the world.
+
+        Only the items that moved since the last frame are updated.
+
+        Args:
+        alpha (float): How far between the last two ticks to draw objects.
+
+        Returns:
+        None
+        """
+        for obj in self.moving_objects:
+            self.renderer.move(obj.shape, obj.interpolated_bbox(alpha))
+        obstacles = self.world.obstacles
+        for i, shape in enumerate(obstacles.shapes):
+            self.renderer.move(shape, obstacles.interpolated_bbox(i, alpha))
+        calls = self.renderer.flush()
+        self.input.frame_drawn(self.world.tick)
+        self.refresh_profiler(calls)
+
+    # Method to update the profiler overlay at the end of a frame
+    def refresh_profiler(self, calls):
+        """Counts the Tcl calls of the frame and refreshes the overlay twice a
+        second, not on every frame.
+
+        Args:
+        calls (int): Tcl calls made by the frame so far.
 
-    
+        Returns:
+        None
+        """
+        if self.profiler.enabled:
+            now = time.perf_counter()
+            if now - self.profiler_shown >= 0.5:
+                self.canvas.itemconfigure(self.profiler_disp,
+                                          text=self.profiler.describe())
+                self.profiler_shown = now
+                calls += 1
+            self.profiler.add('calls', calls)
+
+    # Method to show or hide the profiler overlay
+    def toggle_profiler(self, event=None):
+        """Turns the profiler and its overlay on or off.
+
+        Args:
+        event (Event): The key press, when called from a binding.
+
+        Returns:
+        None
+        """
+        self.profiler.enabled = not self.profiler.enabled
+        if self.simulation is not None:
+            self.simulation.profiler.enabled = self.profiler.enabled
+        if self.profiler_disp is not None:
+            self.canvas.itemconfigure(
+                self.profiler_disp,
+                state='normal' if self.profiler.enabled else 'hidden')
+
+    # Method to reset the game to its initial state
+    def reset_game(self):
+        """Resets the game to its initial state.
+
+        Returns:
+        None
+        """
+        self.death_count = 0
+        self.initialize_game_elements()
+        self.animate()
+        
         
+    # Method to start the main game loop
+    def animate(self):
+        """Starts the main animation loop for the game.
+
+        Returns:
+        None
+        """
+        if self.simulation is None:
+            self.loop.start()
+            return
+        self.deaths_shown = self.death_count
+        self.simulation.start()
+        self.draw_snapshot()
+
+    # Method run on the Tk thread for each frame of the threaded mode
+    def draw_snapshot(self):
+        """Draws the latest snapshot of the simulation thread, updates the
+        death counter and ends the round on victory.
+
+        Returns:
+        None
+        """
+        self.profiler.begin_frame()
+        (taken, tick, prev_player, player, prev_x, prev_y, x, y, deaths,
+         game_over, sim_time, collision_time) = self.simulation.latest()
+        # Count the ticks simulated since the last frame in this one
+        self.profiler.add('sim', sim_time - self.simulated[0])
+        self.profiler.add('collision', collision_time - self.simulated[1])
+        self.simulated = (sim_time, collision_time)
+        # Blend between the last two ticks like the fixed step loop does
+        alpha = min((time.perf_counter() - taken) / self.simulation.dt, 1.0)
+        start = time.perf_counter()
+        self.renderer.move(self.player.shape, tuple(
+            old + (new - old) * alpha
+            for old, new in zip(prev_player, player)))
+        obstacles = self.world.obstacles
+        for i, shape in enumerate(obstacles.shapes):
+            left = float(prev_x[i] + (x[i] - prev_x[i]) * alpha)
+            top = float(prev_y[i] + (y[i] - prev_y[i]) * alpha)
+            size = float(obstacles.size[i])
+            self.renderer.move(shape, (left, top, left + size, top + size))
+        calls = self.renderer.flush()
+        self.profiler.add('render', time.perf_counter() - start)
+        self.refresh_profiler(calls)
+        self.profiler.end_frame()
+        while not self.simulation.applied.empty():
+            self.input.waiting.append(self.simulation.applied.get())
+        self.input.frame_drawn(tick)
+
+        if deaths != self.deaths_shown:
+            self.deaths_shown = deaths
+            self.update_death_counter()
+        if game_over:
+            # The worker has stopped, so the world is safe to read again
+            self.simulation.stop()
+            self.check_victory()
+            return
+        self.scheduler.schedule('frame', 15, self.draw_snapshot)
+
+    # Method run by the game loop on every tick to advance the world and
+    # handle game logic checks
+    def tick(self):
+        """Advances the game by one simulation tick.
+
+        Returns:
+        None
+        """
+        if self.game_over:
+            self.loop.stop()
+            return
+
+        mask = self.input.poll(self.world.tick)
+        if mask is not None:
+            self.player.set_key_mask(mask)
+        deaths = self.world.step()
+        for _ in range(deaths):
+            self.update_death_counter()  # Update the death counter
+
         self.check_victory()
-        self.window.after(30, self.animate)
     
     # Static method to calculate the distance between two points, used in
     # collision detection
@@ -724,42 +3941,7 @@ class Game:
         Returns:
         int: The minimum distance to the nearest obstacle.
         """
-
-        # Start with the maximum possible distance (player's speed)
-        min_distance = max(abs(dx), abs(dy))
-        try:
-            player_coords = self.canvas.coords(player.shape)
-            for wall in self.walls:
-                if dx > 0:  # Moving right
-                    if player_coords[2] <= wall[0] and \
-                       player_coords[3] > wall[1] and\
-                       player_coords[1] < wall[3]:
-                        min_distance = \
-                                     min(min_distance,
-                                         wall[0] - player_coords[2])
-                elif dx < 0:  # Moving left
-                    if player_coords[0] >= wall[2] and \
-                       player_coords[3] > wall[1] \
-                       and player_coords[1] < wall[3]:
-                        min_distance = min(min_distance,
-                                           player_coords[0] - wall[2])
-                if dy > 0:  # Moving down
-                    if player_coords[3] <= wall[1] and \
-                       player_coords[2] > wall[0] \
-                       and player_coords[0] < wall[2]:
-                        min_distance = min(min_distance,
-                                           wall[1] - player_coords[3])
-                elif dy < 0:  # Moving up
-                    if player_coords[1] >= wall[3] and \
-                       player_coords[2] > wall[0] and \
-                       player_coords[0] < wall[2]:
-                        min_distance = min(min_distance,
-                                           player_coords[1] - wall[3])
-        
-        except:
-            pass
-        
-        return min_distance
+        return self.world.distance_to_obstacle(player, dx, dy)
     
     # Method to check for collisions between the player and walls and balls
     def check_collision(self, player, obj):
@@ -773,22 +3955,7 @@ class Game:
         Returns:
         bool: True if there is a collision, False otherwise.
         """
-        player_coords = self.canvas.coords(player.shape)
-        
-        # Check collision with walls
-        for wall in self.walls:
-            if (player_coords[2] > wall[0] and player_coords[0] < wall[2] and
-                player_coords[3] > wall[1] and player_coords[1] < wall[3]):
-                return True
-        
-        # Check collision with balls
-        obj_coords = self.canvas.coords(obj.shape)
-        return (player_coords[2] > obj_coords[0] and
-                player_coords[0] < obj_coords[2] and
-                player_coords[3] > obj_coords[1] and
-                player_coords[1] < obj_coords[3])
-    
-        return False
+        return self.world.check_collision(player, obj)
     
     # Method to check and update the high score based on the player's
     # performance
@@ -800,8 +3967,8 @@ class Game:
         str: Message indicating whether a new high score was achieved.
         """
         # Debugging messages to make sure score calculations are correct
-        print(f"Current Player Score: {self.player.score}")
-        print(f"Previous High Score: {Game.high_score}")
+        SCORE_LOG.debug("Current Player Score: %s", self.player.score)
+        SCORE_LOG.debug("Previous High Score: %s", Game.high_score)
 
         # Check if the player's score is exactly 100
         if self.player.score == 100:
@@ -809,18 +3976,20 @@ class Game:
             if Game.high_score >= 100:
                 Game.high_score += 10
                 self.player.score = Game.high_score
-                print(f"High Score increased to: {Game.high_score}")
+                SCORE_LOG.debug("High Score increased to: %s",
+                                Game.high_score)
             else:
                 # If the high score is less than 100, set it to the player's
                 # score
                 Game.high_score = self.player.score
-                print("High Score updated to the player's " +
-                      "score (less than 100).")
+                SCORE_LOG.debug("High Score updated to the player's " +
+                                "score (less than 100).")
         elif self.player.score > Game.high_score:
             # If the player's score is higher than the high score but not
             # exactly 100
             Game.high_score = self.player.score
-            print("High Score updated to a new higher player's score.")
+            SCORE_LOG.debug("High Score updated to a new higher player's " +
+                            "score.")
 
         # Return appropriate message
         if self.player.score == Game.high_score:
@@ -833,11 +4002,11 @@ class Game:
     def update_death_counter(self):
         """Updates the death counter displayed on the game canvas.
 
+        The world counts the deaths, this only refreshes the text.
+
         Returns:
         None
         """
-        global death_count
-        self.death_count += 1
         self.canvas.itemconfigure(self.death_counter_disp,
                                   text=f"Deaths: {self.death_count}")
       
@@ -848,14 +4017,36 @@ class Game:
         Returns:
         None
         """
-        player_coords = self.canvas.coords(self.player.shape)
-        if (player_coords[2] > self.victory_zone[0] and
-            player_coords[0] < self.victory_zone[2] and
-            player_coords[3] > self.victory_zone[1] and
-            player_coords[1] < self.victory_zone[3]):
+        if self.world.check_victory():
             self.game_over = True
+            self.loop.stop()
+            LOOP_LOG.info(self.loop.report())
+            LOOP_LOG.info(self.scheduler.report())
+            LOOP_LOG.info(self.input.report())
+            self.save_recording()
             self.display_victory_screen()
 
+    # Method to save the inputs of the round when recording
+    def save_recording(self):
+        """Saves the recording of the current round, if recording.
+
+        Every round goes to a file of its own, numbered after the recording
+        path (run.rec gives run-1.rec, run-2.rec...), so a finished round is
+        never replaced by a later one. The recorder is cleared once saved,
+        so the same round isn't saved twice.
+
+        Returns:
+        None
+        """
+        recorder = self.world.recorder
+        if recorder is None or not self.recording_path or not recorder.ticks:
+            return
+        self.recorded_rounds += 1
+        root, extension = os.path.splitext(self.recording_path)
+        recorder.finish(self.world).save(f"{root}-{self.recorded_rounds}" +
+                                         extension)
+        recorder.start()
+
     # Method to animate the victory message on the victory screen
     def animate_victory_message(self):
         """Animates the victory message on the victory screen.
@@ -876,7 +4067,8 @@ class Game:
                 self.letters[i] = (letter_id, phase + speed_increment)
 
             if self.game_over:
-                self.window.after(50, self.animate_victory_message)
+                self.scheduler.schedule('victory', 50,
+                                        self.animate_victory_message)
         except:
             pass
      
@@ -888,24 +4080,50 @@ class Game:
         None
         """
         self.game_over = True
-        self.canvas.delete("all")  # Clear the canvas
-        
+        self.clear_canvas()  # Clear the canvas
+        self.scenes.show('victory')
+
+        # Display death counter
+        self.canvas.itemconfigure(self.victory_fails_disp,
+                                  text=f"{self.death_count}")
+        # Check for a new high score and display the result
+        high_score_message = self.check_new_high_score()
+        self.canvas.itemconfigure(self.victory_score_disp,
+                                  text=high_score_message)
+
+        # Start the You Win message from the same wave every time
+        self.letters = [(letter_id, i * 10)
+                        for i, (letter_id, phase) in enumerate(self.letters)]
+        self.animate_victory_message()
+
+    # Method to create the items of the victory screen
+    def build_victory_screen(self, tags):
+        """Creates the messages, letters and play again button of the victory
+        screen. The texts that change between rounds are filled in by
+        display_victory_screen.
+
+        Args:
+        tags (tuple): Tags to give every item of the screen.
+
+        Returns:
+        None
+        """
+        font = self.fonts['text']
         # Display a background
-        self.canvas.create_rectangle(0, 0, 1026, 646, fill='#b4b6fe')
+        self.canvas.create_rectangle(0, 0, 1026, 646, fill='#b4b6fe',
+                                     tags=tags)
         # Display victory messages
         self.canvas.create_text(1024/2, 330, text="Now try it with your " +
-                                "eyes closed.", fill="black",
-                                font=("Arial", 18))
+                                "eyes closed.", fill="black", font=font,
+                                tags=tags)
         # Display death counter
         self.canvas.create_text(350, 400, text="Fails:", fill="black",
-                                font=("Arial", 18))
-        self.canvas.create_text(680, 400, text=f"{self.death_count}",
-                                fill="black", font=("Arial", 18))
-        
-        # Check for a new high score and display the result
-        high_score_message = self.check_new_high_score()
-        self.canvas.create_text(1024/2, 275, text=high_score_message,
-                                fill="black", font=("Arial", 18))        
+                                font=font, tags=tags)
+        self.victory_fails_disp = self.canvas.create_text(
+            680, 400, text="", fill="black", font=font, tags=tags)
+        # Display the high score result
+        self.victory_score_disp = self.canvas.create_text(
+            1024/2, 275, text="", fill="black", font=font, tags=tags)
 
         message = "You Win!"
         letter_spacing = 65  
@@ -917,31 +4135,782 @@ class Game:
             letter_id = self.canvas.create_text(x_start + i * letter_spacing,
                                                 160, text=letter,
                                                 fill="#000066",
-                                                font=("Arial", 50))
+                                                font=self.fonts['title'],
+                                                tags=tags)
             initial_phase = i * 10  # Different initial phase for each letter
             self.letters.append((letter_id, initial_phase))
 
         # Play again button
         play_again_button = Button(self.canvas, text="Play Again",
                                    command=self.reset_game,
-                                   font=("Arial", 16), padx=20, pady=10)
-        play_again_but_win = self.canvas.create_window(512, 500,
-                                                       window=play_again_button)
-        
-        self.animate_victory_message()
+                                   font=self.fonts['button'], padx=20,
+                                   pady=10)
+        self.canvas.create_window(512, 500, window=play_again_button,
+                                  tags=tags)
       
     # Method to run the game, starting with the start screen and entering the
     # main event loop
     def run(self):
-        """Starts the game by showing the start screen and entering the main
-        event loop.
+        """Starts the game by entering the main event loop. The start screen
+        is already shown by the constructor.
 
         Returns:
         None
         """
-        self.show_start_screen()
+        # The canvas is exposed once the window is mapped and visible
+        self.expose_binding = self.canvas.bind('<Expose>',
+                                               self.canvas_exposed, add='+')
         self.window.mainloop()
 
+    # Method run when the canvas first becomes visible
+    def canvas_exposed(self, event=None):
+        """Waits for Tk to draw the exposed canvas before timing the first
+        frame.
+
+        Args:
+        event (Event): The expose event.
+
+        Returns:
+        None
+        """
+        if self.expose_binding is None:
+            return
+        self.canvas.unbind('<Expose>', self.expose_binding)
+        self.expose_binding = None
+        # Idle callbacks run after Tk has redrawn the exposed area
+        self.scheduler.schedule_idle('first frame', self.first_frame_drawn)
+
+    # Method run once the first screen is on the display
+    def first_frame_drawn(self):
+        """Records how long the game took to draw its first visible frame.
+
+        Returns:
+        None
+        """
+        self.first_frame_time = time.perf_counter() - STARTED
+        LOOP_LOG.info("First frame drawn %.0f ms after start",
+                      self.first_frame_time * 1000)
+
+# Function measuring collision cost before and after many resets, to make
+# sure that playing again doesn't make the game slower
+def benchmark_resets(resets=1000, checks=2000):
+    """Times the collision checks of a round before and after many resets.
+
+    Args:
+    resets (int): Number of resets to run between the two measurements.
+    checks (int): Number of ticks worth of collision checks to time.
+
+    Returns:
+    bool: True if the level and the collision cost stayed flat.
+    """
+    world = World.create_default_world()
+
+    def time_checks():
+        """Returns the best time of a tick worth of collision checks."""
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(checks):
+                world.distance_to_obstacle(world.player, 10, 10)
+                for obj in world.moving_objects[1:]:
+                    world.check_collision(world.player, obj)
+            timings.append((time.perf_counter() - start) / checks)
+        return min(timings)
+
+    walls_before, before = len(world.walls), time_checks()
+    for _ in range(resets):
+        world.reset()
+    walls_after, after = len(world.walls), time_checks()
+
+    print(f"Walls: {walls_before} -> {walls_after} after {resets} resets")
+    print(f"Collision checks per tick: {before * 1e6:.1f} us -> " +
+          f"{after * 1e6:.1f} us")
+    # Allow for timing noise, growth with the resets would be far larger
+    return walls_after == walls_before and after < before * 1.5
+
+# Function measuring the sizes of the containers held by an object
+def container_sizes(prefix, obj):
+    """Returns the length of every list, dict, set and deque attribute of an
+    object.
+
+    Args:
+    prefix (str): Name to put before the attribute names.
+    obj (object): The object to look at.
+
+    Returns:
+    dict: The lengths, by prefixed attribute name.
+    """
+    return {f"{prefix}.{name}": len(value)
+            for name, value in vars(obj).items()
+            if isinstance(value, (list, dict, set, deque))}
+
+# Function counting the resources held by a game and its window
+def game_resources(game):
+    """Counts the canvas items, widgets and callbacks of a game, and the
+    sizes of its containers and those of its world.
+
+    Args:
+    game (Game): The game to look at.
+
+    Returns:
+    dict: The counts, by name.
+    """
+    widgets = 0
+    children = list(game.window.winfo_children())
+    while children:
+        widgets += 1
+        children.extend(children.pop().winfo_children())
+    tk = game.window.tk
+    counts = {'canvas items': len(game.canvas.find_all()),
+              'widgets': widgets,
+              'after callbacks': len(tk.splitlist(tk.call('after', 'info'))),
+              'scheduled callbacks': len(game.scheduler)}
+    counts.update(container_sizes('Game', game))
+    counts.update(container_sizes('World', game.world))
+    return counts
+
+# Function looking for resources that grow with every round played
+def leak_check(cycles=20, ticks=60, tolerance=1024):
+    """Plays rounds from start to victory and checks nothing grows with
+    them.
+
+    Every round holds Right for some ticks, which walks the player into the
+    wall of the start zone, then puts the player on a ball to die on it,
+    then in the victory zone, and plays again. The first round builds the
+    screens, so growth is measured from the end of the second one. Without
+    a display only the world is checked.
+
+    Args:
+    cycles (int): Number of rounds to play, at least 3.
+    ticks (int): Ticks to play in each round before winning.
+    tolerance (int): Bytes of allocations a round may keep, for noise.
+
+    Returns:
+    bool: True if nothing grew.
+    """
+    tracemalloc.start()
+    try:
+        game = Game(1024, 644)
+    except TclError:
+        game = None
+        print("No display available, checking the world only")
+    world = game.world if game is not None else World()
+    victory_zone = world.victory_zone
+
+    # Only the counts after the second and the last rounds are kept, so the
+    # check doesn't measure its own allocations
+    first = last = None
+    for cycle in range(cycles):
+        # Start, or play again from the victory screen
+        if game is None:
+            world.death_count = 0
+            world.reset()
+        else:
+            if cycle == 0:
+                game.show_rules_screen()
+                game.start_game()
+            else:
+                game.reset_game()
+            # The rounds are driven tick by tick below, not by the clock
+            game.loop.stop()
+        step = world.step if game is None else game.tick
+
+        world.player.set_key_mask(8)
+        for _ in range(ticks):
+            step()
+        world.player.set_key_mask(0)
+        # Die on the first ball, so deaths are part of every round
+        ball = world.obstacles.bbox(0)
+        world.player.set_x(ball[0])
+        world.player.set_y(ball[1])
+        step()
+        if not world.death_ticks:
+            print(f"Round {cycle + 1} didn't die on the ball")
+            return False
+        world.player.set_x((victory_zone[0] + victory_zone[2]) / 2 -
+                           world.player.size / 2)
+        world.player.set_y((victory_zone[1] + victory_zone[3]) / 2 -
+                           world.player.size / 2)
+        step()
+        if not world.game_over:
+            print(f"Round {cycle + 1} didn't end in victory")
+            return False
+
+        if game is not None:
+            game.window.update()
+        last = None
+        gc.collect()
+        allocated = tracemalloc.get_traced_memory()[0]
+        if game is not None:
+            last = game_resources(game)
+        else:
+            last = container_sizes('World', world)
+        last['allocated bytes'] = allocated
+        if cycle == 1:
+            first = last
+    tracemalloc.stop()
+    if game is not None:
+        game.window.destroy()
+
+    passed = True
+    print(f"{'':<32}{'round 2':>12}{f'round {cycles}':>12}{'per round':>12}")
+    for name in last:
+        growth = (last[name] - first.get(name, 0)) / (cycles - 2)
+        limit = tolerance if name == 'allocated bytes' else 0
+        line = f"{name:<32}{first.get(name, 0):>12}{last[name]:>12}" + \
+               f"{growth:>+12.1f}"
+        if growth > limit:
+            line += "  GROWING"
+            passed = False
+        print(line)
+    return passed
+
+# Function running quick checks of the headless parts of the game
+def self_test():
+    """Runs regression checks that need no window and prints the outcome of
+    each.
+
+    Returns:
+    bool: True if every check passed.
+    """
+    checks = []
+
+    # The solver must see past the first ball cycle: without balls the cycle
+    # is one tick long, much shorter than any way to the victory zone
+    empty = Level(DEFAULT_LEVEL.walls, DEFAULT_LEVEL.victory_zone,
+                  DEFAULT_LEVEL.spawn, DEFAULT_LEVEL.bounce_bounds, [],
+                  name='Empty level')
+    for level in (empty, DEFAULT_LEVEL):
+        recording = solve_level(level)[0]
+        checks.append((f"solve {level.name}", recording is not None and
+                       replay(recording, level)[1]))
+
+    # Balls following paths have no starting x to check against the limits
+    orbits = create_stress_level(orbits=4)
+    checks.append(("validate a level with path balls",
+                   validate_level(orbits, 100)[0] == []))
+
+    # One frame callback per tick, however often the loop is restarted the
+    # way playing again does, with a window that runs the callbacks itself
+    class Window:
+        """Stands in for Tk, running the pending callbacks when asked."""
+        def __init__(self):
+            self.callbacks = {}
+            self.count = 0
+        def after(self, delay, callback, *args):
+            self.count += 1
+            self.callbacks[self.count] = (callback, args)
+            return self.count
+        def after_cancel(self, after_id):
+            self.callbacks.pop(after_id, None)
+        def run(self):
+            pending, self.callbacks = self.callbacks, {}
+            for callback, args in pending.values():
+                callback(*args)
+            return len(pending)
+
+    window = Window()
+    scheduler = Scheduler(window)
+    loop = FixedStepLoop(scheduler, lambda: None, lambda alpha: None)
+    callbacks = frames = 0
+    most_pending = 0
+    for restart in range(3):
+        loop.start()
+        loop.start()
+        for _ in range(10):
+            time.sleep(loop.dt)
+            callbacks += window.run()
+            frames += 1
+            most_pending = max(most_pending, len(window.callbacks))
+        loop.stop()
+        loop.start()
+        loop.stop()
+    checks.append(("one frame callback per tick",
+                   callbacks == frames and most_pending == 1 and
+                   loop.ticks >= frames and not window.callbacks))
+
+    passed = True
+    for name, result in checks:
+        print(f"{name:<40}{'ok' if result else 'FAILED'}")
+        passed = passed and result
+    return passed
+
+# Function building a bigger version of the default level for benchmarks
+def create_stress_level(balls=4, walls=16, seed=0, orbits=0):
+    """Creates a level with extra balls and wall segments.
+
+    Extra balls move through the grid at random speeds and extra walls are
+    small posts scattered over the whole window. Orbiting balls sit on the
+    turning arms of spokes spread over the grid.
+
+    Args:
+    balls (int): Total number of bouncing balls.
+    walls (int): Total number of walls, at least the 16 of the default level.
+    seed (int): Seed of the random layout, so runs are comparable.
+    orbits (int): Number of orbiting balls.
+
+    Returns:
+    Level: The generated level.
+    """
+    rng = random.Random(seed)
+    ball_specs = list(BALL_SPECS[:balls])
+    while len(ball_specs) < balls:
+        ball_specs.append(dict(x=rng.uniform(303, 695),
+                               y=rng.uniform(263, 403),
+                               x_speed=rng.choice((-1, 1)) *
+                               rng.uniform(2, 10)))
+    while orbits > 0:
+        arms = min(orbits, 4)
+        pivot = (rng.uniform(350, 650), rng.uniform(290, 380))
+        ball_specs += spoke_specs(pivot, arms, 1, rng.uniform(20, 60),
+                                  rng.choice((-1, 1)) * rng.randint(60, 180),
+                                  size=12)
+        orbits -= arms
+    wall_coords = list(WALL_COORDS)
+    while len(wall_coords) < walls:
+        x, y = rng.uniform(0, 1018), rng.uniform(49, 638)
+        wall_coords.append((x, y, x + 6, y + 6))
+    return Level(wall_coords, VICTORY_ZONE, PLAYER_SPAWN, BOUNCE_BOUNDS,
+                 ball_specs, name=f"{len(ball_specs)} balls, {walls} walls")
+
+# Function returning a percentile of a list of timings
+def percentile(values, fraction):
+    """Returns the value below which a fraction of the values fall.
+
+    Args:
+    values (list): The values, in any order.
+    fraction (float): The fraction, between 0 and 1.
+
+    Returns:
+    float: The percentile of the values.
+    """
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+# Function timing each call of a function
+def time_calls(func, count):
+    """Calls a function repeatedly and summarizes how long the calls took.
+
+    Args:
+    func (function): The function to call, without arguments.
+    count (int): Number of calls.
+
+    Returns:
+    dict: Calls per second and the median and 99th percentile latency in
+    microseconds.
+    """
+    clock = time.perf_counter
+    timings = []
+    for _ in range(count):
+        start = clock()
+        func()
+        timings.append(clock() - start)
+    return {'per_sec': count / sum(timings),
+            'p50_us': percentile(timings, 0.5) * 1e6,
+            'p99_us': percentile(timings, 0.99) * 1e6}
+
+# Function measuring the memory allocated while calling a function
+def measure_allocations(func, count):
+    """Calls a function repeatedly while tracing memory allocations.
+
+    Args:
+    func (function): The function to call, without arguments.
+    count (int): Number of calls.
+
+    Returns:
+    dict: The memory still held afterwards per call, in bytes, and the peak
+    memory used on top of what was held before, in kilobytes.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for _ in range(count):
+        func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'retained_bytes': (current - before) / count,
+            'peak_kb': (peak - before) / 1024}
+
+# Function steering the player around during the benchmarks
+def benchmark_world(level):
+    """Creates a world whose player keeps walking in a square.
+
+    Args:
+    level (Level): The level to simulate.
+
+    Returns:
+    tuple: The world and a function running one tick of it.
+    """
+    world = World(level)
+    directions = ('Right', 'Down', 'Left', 'Up')
+
+    def tick():
+        """Turns the player every 10 ticks and steps the world."""
+        player = world.player
+        if world.tick % 10 == 0:
+            turn = directions[world.tick // 10 % 4]
+            for key in player.keys_pressed:
+                player.keys_pressed[key] = key == turn
+            player.start_movement()
+        if world.game_over:
+            world.reset()
+        world.step()
+    return world, tick
+
+# Function measuring the drawing cost, when a display is available
+def benchmark_render(level, ticks):
+    """Times the renderer on a real canvas.
+
+    Args:
+    level (Level): The level to draw.
+    ticks (int): Number of frames to draw.
+
+    Returns:
+    dict: The frame timings, or None when no display is available.
+    """
+    try:
+        game = Game(1024, 644, level=level)
+    except TclError:
+        return None
+    game.initialize_game_elements()
+    world, tick = benchmark_world(level)
+    game.world = world
+    game.clear_canvas()
+    game.create_background()
+    for obj in world.moving_objects:
+        game.draw_object(obj)
+    game.draw_obstacles()
+
+    def frame():
+        """Simulates a tick and draws it."""
+        tick()
+        game.render()
+        game.window.update_idletasks()
+    result = time_calls(frame, ticks)
+    game.window.destroy()
+    return result
+
+# Function running every benchmark on one level size
+def run_benchmarks(balls=4, walls=16, ticks=2000, orbits=0):
+    """Measures the throughput of the simulation and the renderer.
+
+    Args:
+    balls (int): Number of bouncing balls of the level.
+    walls (int): Number of walls of the level.
+    ticks (int): Number of ticks or calls to time for each benchmark.
+    orbits (int): Number of orbiting balls of the level.
+
+    Returns:
+    dict: The results of each benchmark.
+    """
+    level = create_stress_level(balls, walls, orbits=orbits)
+    results = {}
+
+    world, tick = benchmark_world(level)
+    results['step'] = time_calls(tick, ticks)
+    results['step'].update(measure_allocations(tick, ticks))
+
+    world, tick = benchmark_world(level)
+    player = world.player
+    player.keys_pressed['Right'] = True
+    results['move'] = time_calls(player.move, ticks)
+    results['distance_to_obstacle'] = time_calls(
+        lambda: world.distance_to_obstacle(player, 10, 10), ticks)
+
+    # The collision phase of a tick, with the player placed over the first
+    # ball so the exact swept test runs and not only the broadphase
+    world, tick = benchmark_world(level)
+    player, obstacles = world.player, world.obstacles
+    left, top = obstacles.bbox(0)[:2]
+    player.set_x(left)
+    player.set_y(top)
+    start = player.bbox()
+    results['collision'] = time_calls(
+        lambda: (obstacles.swept_hits(start, player.speed, 0),
+                 world.touches_wall(player.bbox())), ticks)
+
+    render = benchmark_render(level, ticks)
+    if render is not None:
+        results['render'] = render
+    return results
+
+# Function printing the benchmark results, compared with a baseline
+def report_benchmarks(results, baseline=None, tolerance=0.2):
+    """Prints the benchmark results and any slowdown against a baseline.
+
+    Args:
+    results (dict): Results of each level size, by name.
+    baseline (dict): Earlier results to compare with, if any.
+    tolerance (float): Fraction of throughput that may be lost before a
+    benchmark counts as a regression.
+
+    Returns:
+    bool: True if no benchmark regressed.
+    """
+    passed = True
+    for scenario, benchmarks in results.items():
+        print(scenario)
+        for name, numbers in benchmarks.items():
+            line = (f"  {name:<22}{numbers['per_sec']:>12.0f}/s" +
+                    f"  p50 {numbers['p50_us']:8.1f} us" +
+                    f"  p99 {numbers['p99_us']:8.1f} us")
+            if 'peak_kb' in numbers:
+                line += (f"  peak {numbers['peak_kb']:6.1f} KB" +
+                         f"  kept {numbers['retained_bytes']:6.1f} B/call")
+            old = (baseline or {}).get(scenario, {}).get(name)
+            if old:
+                change = numbers['per_sec'] / old['per_sec'] - 1
+                line += f"  {change:+.0%}"
+                if change < -tolerance:
+                    line += "  REGRESSION"
+                    passed = False
+            print(line)
+        if 'render' not in benchmarks:
+            print("  render skipped, no display available")
+    return passed
+
+# Function running the benchmark suite from the command line
+def benchmark(scales, ticks, save=None, compare=None):
+    """Runs the benchmarks on several level sizes.
+
+    Args:
+    scales (list): (balls, walls) or (balls, walls, orbits) tuples giving
+    the level sizes.
+    ticks (int): Number of ticks or calls to time for each benchmark.
+    save (str): File to save the results to as a baseline, if any.
+    compare (str): Baseline file to compare the results with, if any.
+
+    Returns:
+    bool: True if no benchmark regressed against the baseline.
+    """
+    results = {}
+    for balls, walls, *orbits in scales:
+        name = f"{balls} balls, {walls} walls"
+        if orbits:
+            name += f", {orbits[0]} orbiting"
+        results[name] = run_benchmarks(balls, walls, ticks, *orbits)
+    baseline = None
+    if compare:
+        with open(compare) as file:
+            baseline = json.load(file)
+    passed = report_benchmarks(results, baseline)
+    if save:
+        with open(save, 'w') as file:
+            json.dump(results, file, indent=2)
+    return passed
+
+# Function listing the names of the levels in a file
+def level_names(path):
+    """Returns the names of the levels of a JSON file or compiled pack.
+
+    Args:
+    path (str): The level file.
+
+    Returns:
+    list: The level names, in order.
+    """
+    levels = load_levels(path)
+    if isinstance(levels, LevelPack):
+        names = [levels.name(index) for index in range(len(levels))]
+        levels.close()
+        return names
+    return [level.name for level in levels]
+
+# Function finding the work of a batch run
+def find_batch_jobs(directory):
+    """Lists the level checks and replays for the files of a directory.
+
+    Every level of the JSON files and compiled packs is checked, even when
+    several files hold the same level, and every recording is replayed on
+    the first level of the same name, or on the built in level.
+
+    Args:
+    directory (str): The directory holding levels and recordings.
+
+    Returns:
+    list: (kind, level name, level file, level index, recording) jobs.
+    """
+    jobs = []
+    by_name = {} # First file and index of each level name
+    recordings = []
+    for entry in sorted(os.listdir(directory)):
+        path = os.path.join(directory, entry)
+        if entry.endswith('.rec'):
+            recordings.append(path)
+        elif entry.endswith(('.json', '.pack')):
+            for index, name in enumerate(level_names(path)):
+                jobs.append(('validate', name, path, index, None))
+                by_name.setdefault(name, (path, index))
+    for path in recordings:
+        name = Recording.load(path).level_name
+        level_path, index = by_name.get(name, (None, 0))
+        jobs.append(('replay', name, level_path, index, path))
+    return jobs
+
+# Function reading the level files of a batch, once per worker process
+@lru_cache(maxsize=16)
+def batch_levels(path):
+    """Returns the levels of a file, loading it the first time a worker
+    process asks for it.
+
+    Jobs are queued file by file, so a worker usually runs many jobs of the
+    same file in a row and only parses it once.
+
+    Args:
+    path (str): The level file.
+
+    Returns:
+    list or LevelPack: The levels, indexable by number.
+    """
+    return load_levels(path)
+
+# Function run by the worker processes of a batch
+def run_batch_job(job):
+    """Runs one level check or replay.
+
+    Args:
+    job (tuple): A job from find_batch_jobs.
+
+    Returns:
+    dict: The outcome of the job.
+    """
+    kind, name, level_path, index, recording_path = job
+    start = time.perf_counter()
+    level = DEFAULT_LEVEL
+    if level_path is not None:
+        level = batch_levels(level_path)[index]
+    if level.name != name:
+        # No file holds the level the recording was made on
+        ticks, deaths, victory_tick = 0, [], None
+        problems = [f"no level named {name!r} to replay on"]
+    elif kind == 'replay':
+        result, passed = replay(Recording.load(recording_path), level)
+        ticks, deaths = result.ticks, result.death_ticks
+        victory_tick = result.victory_tick
+        problems = [] if passed else ["outcome differs from the recording"]
+    else:
+        problems, world = validate_level(level)
+        ticks, deaths = world.tick, world.death_ticks
+        victory_tick = world.victory_tick
+    return {'kind': kind, 'level': name, 'recording': recording_path,
+            'ticks': ticks, 'deaths': len(deaths),
+            'victory_tick': victory_tick, 'problems': problems,
+            'seconds': time.perf_counter() - start}
+
+# Function running a batch of level checks and replays on every core
+def run_batch(directory, workers=None):
+    """Checks the levels and replays the recordings of a directory in
+    parallel and prints the outcome of each run.
+
+    Args:
+    directory (str): The directory holding levels and recordings.
+    workers (int): Number of worker processes, defaulting to one per core.
+
+    Returns:
+    bool: True if every run passed.
+    """
+    jobs = find_batch_jobs(directory)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as executor:
+        results = list(executor.map(run_batch_job, jobs,
+                                    chunksize=max(1, len(jobs) // 64)))
+    elapsed = time.perf_counter() - start
+
+    passed = True
+    for result in results:
+        target = result['recording'] or result['level']
+        status = "; ".join(result['problems']) or "ok"
+        passed = passed and not result['problems']
+        print(f"{result['kind']:<9}{target}: {result['ticks']} ticks, " +
+              f"{result['deaths']} deaths, " +
+              f"victory at {result['victory_tick']}, {status}")
+    ticks = sum(result['ticks'] for result in results)
+    print(f"{len(results)} runs, {ticks} ticks in {elapsed:.2f} s " +
+          f"({ticks / max(elapsed, 1e-9):.0f} ticks/s, " +
+          f"{workers} workers)")
+    return passed
+
+# Function reading the command line options
+def parse_args(argv=None):
+    """Parses the command line options.
+
+    Args:
+    argv (list): The arguments to parse, defaulting to sys.argv.
+
+    Returns:
+    Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description="World's Hardest Game")
+    parser.add_argument('--bench-resets', type=int, metavar='N',
+                        help="check collision cost stays flat after N " +
+                        "resets, without opening a window")
+    parser.add_argument('--leak-check', type=int, metavar='ROUNDS',
+                        help="play ROUNDS rounds to victory and fail if " +
+                        "memory, canvas items, widgets, callbacks or lists " +
+                        "grow with them")
+    parser.add_argument('--self-test', action='store_true',
+                        help="run the regression checks that need no " +
+                        "window and exit")
+    parser.add_argument('--bench', action='store_true',
+                        help="run the benchmark suite and exit")
+    parser.add_argument('--bench-scale', action='append',
+                        metavar='BALLS:WALLS[:ORBITS]',
+                        help="level size to benchmark, can be repeated " +
+                        "(default 4:16, 100:100 and 400:1000)")
+    parser.add_argument('--bench-ticks', type=int, default=2000, metavar='N',
+                        help="ticks to time for each benchmark")
+    parser.add_argument('--bench-save', metavar='FILE',
+                        help="save the benchmark results as a baseline")
+    parser.add_argument('--bench-compare', metavar='FILE',
+                        help="compare the benchmark results with a " +
+                        "baseline, failing on regressions")
+    parser.add_argument('--level', metavar='FILE[:N]',
+                        help="play level N (default 0) of a JSON file or " +
+                        "compiled level pack")
+    parser.add_argument('--export-levels', metavar='FILE',
+                        help="save the built in level as JSON to start " +
+                        "authoring from")
+    parser.add_argument('--compile-levels', nargs=2,
+                        metavar=('SOURCE', 'PACK'),
+                        help="compile the levels of a JSON file to a pack")
+    parser.add_argument('--record', metavar='FILE',
+                        help="record the inputs of each round to a file " +
+                        "of its own, numbered after FILE")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="replay a recording without a window and " +
+                        "check it ends the same way")
+    parser.add_argument('--batch', metavar='DIR',
+                        help="check every level and replay every " +
+                        "recording of DIR in parallel")
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help="worker processes for --batch (default: " +
+                        "one per core)")
+    parser.add_argument('--solve', action='store_true',
+                        help="find the fastest way to win the level " +
+                        "without dying")
+    parser.add_argument('--solve-save', metavar='FILE',
+                        help="save the solution found by --solve as a " +
+                        "recording")
+    parser.add_argument('--threaded', action='store_true',
+                        help="simulate on a worker thread, leaving the Tk " +
+                        "thread to input and drawing")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="show the profiler overlay from the start, " +
+                        "save the last frame timings to FILE and print " +
+                        "the input latency on exit")
+    parser.add_argument('--log-level', default='WARNING',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="lowest level of messages to log")
+    parser.add_argument('--log', default='', metavar='CATEGORIES',
+                        help="comma separated categories to log at debug " +
+                        "level: " + ", ".join(LOG_CATEGORIES))
+    parser.add_argument('--log-ring', type=int, default=0, metavar='N',
+                        help="keep the last N log records in memory")
+    parser.add_argument('--log-dump', metavar='FILE',
+                        help="write the kept log records to FILE on exit")
+    return parser.parse_args(argv)
+
 def main():
     global game
     """Main function to initialize and run the game.
@@ -949,7 +4918,88 @@ def main():
     Returns:
     None
     """
-    game = Game.create_default_game()
+    args = parse_args()
+    categories = [name for name in args.log.split(',') if name]
+    ring = configure_logging(args.log_level, categories, args.log_ring)
+    if ring is not None and args.log_dump:
+        atexit.register(ring.dump, args.log_dump)
+    if args.bench_resets is not None:
+        sys.exit(0 if benchmark_resets(args.bench_resets) else 1)
+    if args.leak_check is not None:
+        sys.exit(0 if leak_check(max(args.leak_check, 3)) else 1)
+    if args.self_test:
+        sys.exit(0 if self_test() else 1)
+    if args.bench:
+        scales = [tuple(int(n) for n in scale.split(':'))
+                  for scale in args.bench_scale or ('4:16', '100:100',
+                                                    '400:1000')]
+        sys.exit(0 if benchmark(scales, args.bench_ticks, args.bench_save,
+                                args.bench_compare) else 1)
+
+    if args.export_levels:
+        save_levels_json([DEFAULT_LEVEL], args.export_levels)
+        return
+    if args.compile_levels:
+        source, pack = args.compile_levels
+        try:
+            compile_level_pack(load_levels_json(source), pack)
+        except ValueError as error:
+            # Levels with path balls are valid, but only as JSON
+            print(f"Can't compile {source}: {error}")
+            sys.exit(1)
+        return
+
+    if args.batch:
+        sys.exit(0 if run_batch(args.batch, args.workers) else 1)
+
+    level = DEFAULT_LEVEL
+    if args.level:
+        path, _, index = args.level.partition(':')
+        level = load_levels(path)[int(index or 0)]
+
+    if args.solve:
+        recording, stats = solve_level(level)
+        print(f"{level.name}: {stats['states']} states, " +
+              f"{stats['moves']} player moves, ball cycle of " +
+              f"{stats['cycle_length']} ticks from tick " +
+              f"{stats['cycle_start']}, {stats['seconds']:.2f} s")
+        if recording is None:
+            if stats['gave_up']:
+                print(f"Search stopped after {stats['states']} states " +
+                      "without finding a way to win")
+            else:
+                print("No way to win the level was found")
+            sys.exit(1)
+        print(f"Par time: {recording.ticks} ticks " +
+              f"({recording.ticks / TICK_RATE:.2f} s)")
+        if args.solve_save:
+            recording.save(args.solve_save)
+        return
+
+    if args.replay:
+        recording = Recording.load(args.replay)
+        start = time.perf_counter()
+        result, matches = replay(recording, level)
+        elapsed = time.perf_counter() - start
+        print(f"{args.replay}: {result.ticks} ticks in {elapsed:.3f} s " +
+              f"({result.ticks / max(elapsed, 1e-9):.0f} ticks/s), " +
+              f"deaths at {result.death_ticks}, " +
+              f"victory at {result.victory_tick}")
+        if not matches:
+            print(f"Mismatch: recorded deaths at {recording.death_ticks}, " +
+                  f"victory at {recording.victory_tick}")
+        sys.exit(0 if matches else 1)
+
+    game = Game(1024, 644, level=level, threaded=args.threaded)
+    if args.record:
+        game.world.recorder = InputRecorder()
+        game.recording_path = args.record
+        # Keep unfinished rounds too, they are the ones bugs happen in
+        atexit.register(game.save_recording)
+    if args.profile:
+        game.toggle_profiler()
+        atexit.register(game.profiler.dump, args.profile)
+        atexit.register(lambda: print(game.input.report()))
     game.run()
 
 # This ensures that the main function is called only when the script is